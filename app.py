@@ -1,51 +1,160 @@
+import hmac
+import io
 import os
 import threading as thread
+from typing import Callable
 
-from flask import Flask, jsonify, request, send_from_directory
+import pandas as pd
+from flask import Flask, g, jsonify, request, send_from_directory
 from flask_caching import Cache
 from flask_cors import CORS
 from flask_marshmallow import Marshmallow
 from termcolor import colored
 from waitress import serve
 
+from backend.src.flask.cache import get_digest, get_request_digest
+from backend.src.flask.limits import (EndpointExecutor, ExecutionTimeout,
+                                      LimitExceeded)
+from backend.src.flask.prefork import serve_prefork
+from backend.src.flask.single_flight import SingleFlight
 from backend.src.flask.schemas.api_endpoint_schemas import (
     DejureGraphSchema, DfgSchema, DistributionSchema, GetVariantListSchema,
-    KpiSchema)
+    KpiBatchSchema, KpiSchema)
 from backend.src.flask.services.process_mining_service import \
     ProcessMiningService
-from definitions import CLEAN_EVENT_LOG_PATH
+from backend.src.flask.warmup import (WarmUp, get_default_warmup_requests,
+                                      load_warmup_requests)
+from definitions import CLEAN_EVENT_LOG_PATH, RESULT_CACHE_PATH
 
+# the service is loaded before the workers are forked, such that all workers share the event log
 PROCESS_MINING_SERVICE = ProcessMiningService()
+WORKERS = int(os.environ.get('ORCA_WORKERS', 1))
+
+# Appending referrals permanently changes the event log, so the endpoint is disabled unless ORCA_REFERRALS_TOKEN is set.
+# The requests must then send the token as bearer token and their body must not exceed ORCA_REFERRALS_MAX_BYTES.
+REFERRALS_TOKEN = os.environ.get('ORCA_REFERRALS_TOKEN')
+REFERRALS_MAX_BYTES = int(os.environ.get('ORCA_REFERRALS_MAX_BYTES', 16 * 1024 * 1024))  # 16 MB
 
 config = {
     # Flask-Caching related configs
-    "CACHE_TYPE": "SimpleCache",
+    # set ORCA_CACHE_TYPE=backend.src.flask.cache.SQLiteCache to share the results between processes
+    "CACHE_TYPE": os.environ.get('ORCA_CACHE_TYPE', 'SimpleCache'),
     "CACHE_DEFAULT_TIMEOUT": 3600,  # 1 hour
     "CACHE_THRESHOLD": 1000,
+    "CACHE_SQLITE_PATH": os.environ.get('ORCA_CACHE_PATH', RESULT_CACHE_PATH),
+    "CACHE_MAX_BYTES": 256 * 1024 * 1024,  # 256 MB
+}
+
+ENDPOINT_SCHEMAS = {
+    '/variants': GetVariantListSchema,
+    '/distributions': DistributionSchema,
+    '/dfg': DfgSchema,
+    '/dejure': DejureGraphSchema,
+    '/kpi': KpiSchema,
+    '/kpi-batch': KpiBatchSchema,
+}
+
+# The computations of each endpoint run on a bounded number of threads, such that slow requests of one endpoint do not
+# starve the other endpoints. Requests beyond the queue are rejected with 503, requests beyond the timeout with 504.
+ENDPOINT_EXECUTORS = {
+    path: EndpointExecutor(path, max_workers=2, max_queue=8, timeout=30)
+    for path in ENDPOINT_SCHEMAS.keys()
 }
 
+# identical requests that are computed at the same time share one computation
+SINGLE_FLIGHT = SingleFlight()
+
+# The results of the requests that the dashboard sends when it is opened are precomputed in the background after the
+# server started. Set ORCA_WARMUP=0 to disable the warm-up or ORCA_WARMUP_REQUESTS to the path of a json file with
+# other requests, see load_warmup_requests.
+if os.environ.get('ORCA_WARMUP', '1') == '0':
+    WARMUP_REQUESTS = []
+elif 'ORCA_WARMUP_REQUESTS' in os.environ:
+    WARMUP_REQUESTS = load_warmup_requests(os.environ['ORCA_WARMUP_REQUESTS'])
+else:
+    WARMUP_REQUESTS = get_default_warmup_requests()
+
+# the threads of the server mostly wait for the executors of the endpoints, so there are more threads than workers
+SERVER_THREADS = 16
+
 app = Flask('ORCA')
 app.config.from_mapping(config)
 
 ma = Marshmallow(app)
 CORS(app)
 cache = Cache(app)
+# all cache types except the in-memory caches are shared between the workers, so one worker warms up the cache of all
+SHARED_CACHE = config['CACHE_TYPE'] not in ('SimpleCache', 'NullCache')
+WARMUP = WarmUp(app, WARMUP_REQUESTS, cache if SHARED_CACHE else None)
 
 
 def make_cache_key() -> str:
     """
     Used to generate a cache key for caching the results of a request.
-    This is based on the json body of the request.
+    This is based on a stable digest of the request loaded by the schema of the endpoint, such that the key is the same
+    in all processes and for bodies that only differ in the order of their keys, filters or values.
+    Invalid bodies are keyed by the digest of the json body.
+    The key also contains the version of the data selected by the filters of the request, such that appended
+    referrals only invalidate the results of the requests whose filters match the new cases, and results of a
+    persistent cache are not used after a restart with a changed event log.
+    The key is kept for the current request, such that the computation of the result can reuse it.
 
     Returns:
         str: The cache key
     """
     request_path = request.path
 
-    data = request.get_json()
-    hashed_data = hash(str(data))
+    data = request.get_json(force=True)
+    schema = ENDPOINT_SCHEMAS[request_path]()
+    if data and not schema.validate(data):
+        loaded = schema.load(data)
+        hashed_data = get_request_digest(loaded)
+        version = PROCESS_MINING_SERVICE.get_version(loaded.filters or [])
+    else:
+        hashed_data = get_digest(data)
+        version = PROCESS_MINING_SERVICE.get_version()
+
+    g.cache_key = f'{request_path}_{version}_{hashed_data}'
+    return g.cache_key
+
+
+def make_attributes_cache_key() -> str:
+    """
+    Used to generate a cache key for caching the attributes, which change if referrals are appended.
 
-    return f'{request_path}_{hashed_data}'
+    Returns:
+        str: The cache key
+    """
+    return f'{request.path}_{PROCESS_MINING_SERVICE.get_version()}'
+
+
+def compute(fn: Callable, loaded_request: object) -> object:
+    """
+    Compute the result of a request of the current endpoint. Requests with the same cache key that arrive while the
+    result is computed wait for this computation instead of computing the result again, e.g. when the cached result of
+    a request that is used by several dashboards expired. The computation runs on the executor of the endpoint.
+
+    Args:
+        fn (Callable): The method of the process mining service.
+        loaded_request (object): The request loaded by the schema of the endpoint.
+
+    Returns:
+        object: The result of the request
+    """
+    executor = ENDPOINT_EXECUTORS[request.path]
+    # the cached view already built the key before it called the view
+    key = g.get('cache_key') or make_cache_key()
+    return SINGLE_FLIGHT.do(key, executor.run, fn, request=loaded_request)
+
+
+@app.errorhandler(LimitExceeded)
+def handle_limit_exceeded(e: LimitExceeded):
+    return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
+
+
+@app.errorhandler(ExecutionTimeout)
+def handle_execution_timeout(e: ExecutionTimeout):
+    return jsonify({'message': str(e)}), 504
 
 
 @app.route('/')
@@ -75,7 +184,7 @@ def variants():
     if errors:
         return jsonify({"status": "error", "errors": errors}), 422
 
-    variants = PROCESS_MINING_SERVICE.get_variants(request=schema.load(json_data))
+    variants = compute(PROCESS_MINING_SERVICE.get_variants, schema.load(json_data))
 
     return jsonify(variants), 200
 
@@ -93,7 +202,7 @@ def distributions():
     if errors:
         return jsonify({"status": "error", "errors": errors}), 422
 
-    distribution = PROCESS_MINING_SERVICE.get_attribute_distribution(request=schema.load(json_data))
+    distribution = compute(PROCESS_MINING_SERVICE.get_attribute_distribution, schema.load(json_data))
 
     return jsonify(distribution), 200
 
@@ -111,12 +220,13 @@ def dfg():
     if errors:
         return jsonify({"status": "error", "errors": errors}), 422
 
-    distribution = PROCESS_MINING_SERVICE.get_dfg(request=schema.load(json_data))
+    distribution = compute(PROCESS_MINING_SERVICE.get_dfg, schema.load(json_data))
 
     return jsonify(distribution), 200
 
 
 @app.route('/dejure', methods=['POST'])
+@cache.cached(timeout=3600, make_cache_key=make_cache_key)
 def dejure_graph():
     json_data = request.get_json(force=True)
     if not json_data:
@@ -128,7 +238,7 @@ def dejure_graph():
     if errors:
         return jsonify({"status": "error", "errors": errors}), 422
 
-    kpi_data = PROCESS_MINING_SERVICE.get_dejure_graph(request=schema.load(json_data))
+    kpi_data = compute(PROCESS_MINING_SERVICE.get_dejure_graph, schema.load(json_data))
 
     return jsonify(kpi_data), 200
 
@@ -146,23 +256,102 @@ def kpi():
     if errors:
         return jsonify({"status": "error", "errors": errors}), 422
 
-    kpi_data = PROCESS_MINING_SERVICE.get_kpi_data(request=schema.load(json_data))
+    kpi_data = compute(PROCESS_MINING_SERVICE.get_kpi_data, schema.load(json_data))
+
+    return jsonify(kpi_data), 200
+
+
+@app.route('/kpi-batch', methods=['POST'])
+@cache.cached(timeout=3600, make_cache_key=make_cache_key)
+def kpi_batch():
+    json_data = request.get_json(force=True)
+    if not json_data:
+        return jsonify({'message': 'No input data provided'}), 400
+
+    # Validate and deserialize input
+    schema = KpiBatchSchema()
+    errors = schema.validate(json_data)
+    if errors:
+        return jsonify({"status": "error", "errors": errors}), 422
+
+    kpi_data = compute(PROCESS_MINING_SERVICE.get_kpi_batch, schema.load(json_data))
 
     return jsonify(kpi_data), 200
 
 
 @app.route('/patient-attributes')
-@cache.cached(timeout=3600)
+@cache.cached(timeout=3600, make_cache_key=make_attributes_cache_key)
 def get_patient_attributes():
     return jsonify(PROCESS_MINING_SERVICE.get_patient_attributes())
 
 
 @app.route('/process-attributes')
-@cache.cached(timeout=3600)
+@cache.cached(timeout=3600, make_cache_key=make_attributes_cache_key)
 def get_filter_attributes():
     return jsonify(PROCESS_MINING_SERVICE.get_process_attributes())
 
 
+@app.route('/referrals', methods=['POST'])
+def append_referrals():
+    if not REFERRALS_TOKEN:
+        return jsonify({'message': 'Appending referrals is disabled'}), 404
+
+    authorization = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(authorization.encode(), f'Bearer {REFERRALS_TOKEN}'.encode()):
+        return jsonify({'message': 'A valid token is required to append referrals'}), 401
+
+    if request.content_length is None:
+        return jsonify({'message': 'The length of the referrals is required'}), 411
+    if request.content_length > REFERRALS_MAX_BYTES:
+        return jsonify({'message': f'The referrals must not exceed {REFERRALS_MAX_BYTES} bytes'}), 413
+
+    if WORKERS > 1:
+        # the referrals would only be appended to the event log of the worker that handles the request
+        return jsonify({'message': 'Referrals can only be appended if the server runs with a single worker'}), 409
+
+    # the referrals are sent as csv in the format of the raw data
+    try:
+        raw = pd.read_csv(io.BytesIO(request.get_data()))
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError):
+        return jsonify({'message': 'No valid csv data provided'}), 400
+
+    try:
+        cases = PROCESS_MINING_SERVICE.append_referrals(raw)
+    except ValueError as e:
+        return jsonify({"status": "error", "errors": str(e)}), 422
+
+    return jsonify({'cases': cases}), 200
+
+
+@app.route('/filter-cache')
+def get_filter_cache_stats():
+    return jsonify(PROCESS_MINING_SERVICE.get_filter_cache_stats())
+
+
+@app.route('/limits')
+def get_limit_stats():
+    return jsonify({path: executor.stats() for path, executor in ENDPOINT_EXECUTORS.items()})
+
+
+@app.route('/warmup')
+def get_warmup_stats():
+    # the server is reported as ready once the warm-up is finished, e.g. for the health checks of a load balancer
+    stats = WARMUP.stats()
+    return jsonify(stats), 200 if stats['finished'] else 503
+
+
+def start_worker_warmup(worker: int):
+    """
+    Start the warm-up in a forked worker. With a shared result cache, only the first worker runs the warm-up and the
+    other workers report its progress. A replacement of the first worker does not run a finished warm-up again.
+
+    Args:
+        worker (int): The number of the worker.
+    """
+    if not SHARED_CACHE or (worker == 0 and not WARMUP.ready):
+        WARMUP.start()
+
+
 @app.route('/event-log')
 def download_event_log():
     # split the path into directory and filename
@@ -179,4 +368,9 @@ def serve_static_file(file):
 if __name__ == '__main__':
     port = 80
     print(f'🟢 - Server running at', colored(f'http://127.0.0.1:{port}', 'green'))
-    serve(app, host='0.0.0.0', port=80)
\ No newline at end of file
+    if WORKERS > 1:
+        serve_prefork(app, host='0.0.0.0', port=port, workers=WORKERS, post_fork=start_worker_warmup,
+                      threads=SERVER_THREADS)
+    else:
+        WARMUP.start()
+        serve(app, host='0.0.0.0', port=port, threads=SERVER_THREADS)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.src.data.extract import extract, extract_iterative
+
+"""
+This script is used to benchmark the extraction of the event log. As the ORCHID dataset is not publicly available,
+synthetic raw data with the same columns is generated for the benchmark.
+
+Usage:
+    python backend/src/data/benchmark.py --sizes 10000 100000 1000000 10000000 --max-iterative 100000
+"""
+
+OUTCOMES = ['Transplanted', 'Recovered for Research', 'Recovered for Transplant but not Transplanted',
+            'Not Recovered', None]
+
+
+def generate_raw(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate synthetic raw data in the format of the ORCHID dataset. Each row corresponds to a referred patient.
+    Patients are only authorized if they were approached, organs are only procured if the patient was authorized and
+    only transplanted if they were procured. About one percent of the approached patients miss the approach timestamp.
+
+    Args:
+        n (int): The number of referrals.
+        seed (int, optional): The seed of the random number generator. Defaults to 0.
+
+    Returns:
+        (pd.DataFrame): The synthetic raw data.
+    """
+    rng = np.random.default_rng(seed)
+
+    opo = rng.choice(['OPO1', 'OPO2', 'OPO3', 'OPO4', 'OPO5', 'OPO6'], n)
+    patient = rng.permutation(n).astype(str)
+
+    approached = rng.random(n) < 0.4
+    authorized = approached & (rng.random(n) < 0.6)
+    procured = authorized & (rng.random(n) < 0.7)
+    transplanted = procured & (rng.random(n) < 0.8)
+
+    def seconds(low: int, high: int) -> np.ndarray:
+        return rng.integers(low, high, n).astype('timedelta64[s]')
+
+    time_referred = np.datetime64('2030-01-01', 'ns') + seconds(0, 5 * 365 * 86400)
+    time_approached = time_referred + seconds(60, 5 * 86400)
+    # the authorization can happen before the approach in the dataset
+    time_authorized = time_approached + seconds(-3600, 3 * 86400)
+    time_procured = time_authorized + seconds(0, 3 * 86400)
+
+    raw = pd.DataFrame({
+        'PatientID': np.char.add(np.char.add(opo, '_P'), patient),
+        'OPO': opo,
+        'HospitalID': np.char.add(np.char.add(opo, '_H'), rng.integers(0, 500, n).astype(str)),
+        'Age': np.where(rng.random(n) < 0.01, np.nan, rng.integers(0, 90, n)),
+        'Gender': rng.choice(['M', 'F'], n),
+        'Race': rng.choice(['White / Caucasian', 'Black / African American', 'Hispanic', 'Asian', 'Other'], n),
+        'brain_death': rng.random(n) < 0.3,
+        'Referral_Year': rng.integers(2015, 2022, n),
+        'Referral_DayofWeek': rng.choice(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday',
+                                          'Sunday'], n),
+        'Cause_of_Death_UNOS': rng.choice(['Head Trauma', 'Anoxia', 'CVA/Stroke', None], n),
+        'Mechanism_of_Death': rng.choice(['Blunt Injury', 'Cardiovascular', 'Drug Intoxication', None], n),
+        'Circumstances_of_Death': rng.choice(['MVA', 'Accident, Non-MVA', 'Natural Causes', None], n),
+    })
+
+    for organ in ['heart', 'liver', 'kidney_left', 'kidney_right', 'lung_left', 'lung_right', 'pancreas']:
+        raw[f'outcome_{organ}'] = np.where(procured, rng.choice(OUTCOMES, n), None)
+
+    raw['time_referred'] = time_referred
+    raw['time_approached'] = np.where(approached & (rng.random(n) > 0.01), time_approached, np.datetime64('NaT'))
+    raw['time_authorized'] = np.where(authorized, time_authorized, np.datetime64('NaT'))
+    raw['time_procured'] = np.where(procured, time_procured, np.datetime64('NaT'))
+    raw['approached'] = approached
+    raw['authorized'] = authorized
+    raw['procured'] = procured
+    raw['transplanted'] = transplanted
+
+    return raw
+
+
+def benchmark(sizes: list[int], max_iterative: int) -> pd.DataFrame:
+    """
+    Benchmark the vectorized and the iterative extraction on synthetic raw data of the given sizes.
+
+    Args:
+        sizes (list[int]): The numbers of referrals to benchmark.
+        max_iterative (int): The maximum number of referrals for which the iterative extraction is benchmarked.
+
+    Returns:
+        (pd.DataFrame): The runtime of both extractions in seconds for each size.
+    """
+    results = []
+    for n in sizes:
+        raw = generate_raw(n)
+        result = {'referrals': n}
+
+        start = time.perf_counter()
+        vectorized = extract(raw.copy())
+        result['vectorized'] = time.perf_counter() - start
+
+        if n <= max_iterative:
+            start = time.perf_counter()
+            iterative = extract_iterative(raw.copy())
+            result['iterative'] = time.perf_counter() - start
+
+            # both extractions must produce the same event log
+            pd.testing.assert_frame_equal(vectorized, iterative)
+            result['speedup'] = result['iterative'] / result['vectorized']
+
+        results.append(result)
+
+    return pd.DataFrame(results).set_index('referrals')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the extraction of the event log.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 10_000_000],
+                        help='The numbers of referrals to benchmark.')
+    parser.add_argument('--max-iterative', type=int, default=100_000,
+                        help='The maximum number of referrals for which the iterative extraction is benchmarked.')
+    args = parser.parse_args()
+
+    print(benchmark(args.sizes, args.max_iterative).to_string())
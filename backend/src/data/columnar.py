@@ -0,0 +1,155 @@
+import glob
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+"""
+A typed columnar store for data frames. Every column is saved as a separate `.npy` file that can be memory-mapped
+when it is loaded again, so no parsing is necessary. Categorical and string columns are dictionary-encoded, i.e. only
+the integer codes are stored in the column file and the categories are stored in the metadata file of the store.
+The metadata file also records the size and modification time of the file the store was created from, such that a
+store that is out of date with its source can be detected.
+"""
+
+COLUMNAR_FORMAT_VERSION = 5
+"""The version of the store format. Stores with a different version are considered stale."""
+
+METADATA_FILE = 'metadata.json'
+
+
+def _source_signature(source: str) -> dict[str, int]:
+    """
+    Get the signature of a source file, which consists of its size and its modification time.
+
+    Args:
+        source (str): The path to the source file.
+
+    Returns:
+        (dict[str, int]): The signature of the source file.
+    """
+    stat = os.stat(source)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_columnar(df: pd.DataFrame, path: str, source: str | None = None) -> None:
+    """
+    Write the data frame to a columnar store at the given path. The columns are written to new files and the metadata
+    file is replaced atomically afterwards, such that a store that was only written partially is never considered
+    valid. The column files of a previous store are never overwritten, as they might be memory-mapped by data frames
+    that were read from it; they are removed once the new metadata is in place, which keeps existing mappings valid.
+
+    Args:
+        df (pd.DataFrame): The data frame.
+        path (str): The path to the directory of the store.
+        source (str, optional): The path to the file the data frame was loaded from. Defaults to None.
+
+    Raises:
+        ValueError: If the data frame contains a column with an unsupported type.
+    """
+    os.makedirs(path, exist_ok=True)
+    metadata_path = os.path.join(path, METADATA_FILE)
+
+    # the files of every write have a unique suffix, such that no file of a previous store is overwritten
+    suffix = uuid.uuid4().hex[:12]
+    columns = []
+    for i, (name, column) in enumerate(df.items()):
+        entry = {'name': name, 'file': f'column_{i}_{suffix}.npy'}
+
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # store the codes and keep the categories in the metadata
+            entry['kind'] = 'categorical'
+            entry['categories'] = column.cat.categories.tolist()
+            entry['categories_dtype'] = str(column.cat.categories.dtype)
+            values = column.cat.codes.to_numpy()
+        elif column.dtype == object:
+            # dictionary-encode the strings
+            codes, uniques = pd.factorize(column)
+            entry['kind'] = 'object'
+            entry['categories'] = uniques.tolist()
+            values = codes
+        elif pd.api.types.is_datetime64_dtype(column.dtype) or pd.api.types.is_numeric_dtype(column.dtype):
+            entry['kind'] = 'plain'
+            values = column.to_numpy()
+        else:
+            raise ValueError(f'The column {name} has an unsupported type {column.dtype}.')
+
+        np.save(os.path.join(path, entry['file']), values, allow_pickle=False)
+        columns.append(entry)
+
+    metadata = {
+        'version': COLUMNAR_FORMAT_VERSION,
+        'source': _source_signature(source) if source is not None else None,
+        'columns': columns,
+    }
+
+    # write the metadata atomically
+    with open(f'{metadata_path}.tmp', 'w') as f:
+        json.dump(metadata, f)
+    os.replace(f'{metadata_path}.tmp', metadata_path)
+
+    # the pages of removed files stay available to existing memory mappings
+    current = {entry['file'] for entry in columns}
+    for file in glob.glob(os.path.join(path, 'column_*.npy')):
+        if os.path.basename(file) not in current:
+            try:
+                os.remove(file)
+            except OSError:
+                # e.g. on Windows, mapped files cannot be removed, they are removed by a later write
+                pass
+
+
+def read_columnar(path: str, mmap: bool = True) -> pd.DataFrame:
+    """
+    Read a data frame from the columnar store at the given path.
+
+    Args:
+        path (str): The path to the directory of the store.
+        mmap (bool, optional): Whether to memory-map the column files. Defaults to True.
+
+    Returns:
+        (pd.DataFrame): The data frame. If the column files are memory-mapped, processes that read the same store
+            share the pages of the column files instead of copying them, as long as they do not modify them.
+    """
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+
+    data = {}
+    for entry in metadata['columns']:
+        # the column files are mapped copy-on-write, as some pandas functions write to their input, e.g. the median
+        values = np.load(os.path.join(path, entry['file']), mmap_mode='c' if mmap else None, allow_pickle=False)
+
+        match entry['kind']:
+            case 'categorical':
+                categories = pd.Index(entry['categories'], dtype=entry['categories_dtype'])
+                data[entry['name']] = pd.Categorical.from_codes(values, categories=categories)
+            case 'object':
+                categories = np.array(entry['categories'] + [np.nan], dtype=object)
+                # the code -1 represents a missing value and maps to the last element
+                data[entry['name']] = categories[values]
+            case _:
+                data[entry['name']] = values
+
+    # without copying, every column keeps its own block, which is backed by the memory-mapped file
+    return pd.DataFrame(data, copy=False)
+
+
+def is_columnar_fresh(path: str, source: str) -> bool:
+    """
+    Check whether the columnar store at the given path exists and is up to date with the given source file.
+
+    Args:
+        path (str): The path to the directory of the store.
+        source (str): The path to the file the store was created from.
+
+    Returns:
+        (bool): Whether the store can be used instead of the source file.
+    """
+    try:
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        return metadata['version'] == COLUMNAR_FORMAT_VERSION and metadata['source'] == _source_signature(source)
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return False
@@ -1,7 +1,17 @@
+import argparse
+import csv
+import heapq
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+
+import numpy as np
 import pandas as pd
 from pandas import Timedelta
 
-from definitions import ROOT_DIR, CLEAN_EVENT_LOG_PATH, PATIENT_ATTRIBUTES
+from backend.src.process_mining.event_log import load_event_log
+from definitions import ROOT_DIR, CLEAN_EVENT_LOG_PATH, COLUMNAR_EVENT_LOG_PATH, PATIENT_ATTRIBUTES
 
 """
 This script is used to extract an event log from the original data.
@@ -37,9 +47,152 @@ PATIENT_DATA_MAPPING = {
 }
 
 
+# The activities in the order they are added for each patient. For each activity, the flag column that indicates
+# whether the activity happened (None if it always happens), the time column and the offset to the time are given.
+ACTIVITIES = [
+    ('Referral', None, 'time_referred', Timedelta(0)),
+    # Unfortunately, the evaluation time is not available in the dataset
+    # We assume that the evaluation happens one minute after the referral
+    ('Evaluation', None, 'time_referred', Timedelta(minutes=1)),
+    ('Approach', 'approached', 'time_approached', Timedelta(0)),
+    ('Authorization', 'authorized', 'time_authorized', Timedelta(0)),
+    ('Procurement', 'procured', 'time_procured', Timedelta(0)),
+    # Unfortunately, the transplant time is not available in the dataset
+    # We assume that the transplant happens one minute after the procurement
+    ('Transplant', 'transplanted', 'time_procured', Timedelta(minutes=1)),
+]
+
+
+def _prepare_raw(raw: pd.DataFrame) -> None:
+    """
+    Prepare the raw data for the extraction by converting all time columns to datetime and only keeping the allowed
+    categories for the outcome columns. The raw data is modified in place.
+
+    Args:
+        raw (pd.DataFrame): The raw data
+
+    Raises:
+        ValueError: If a column that is required for the extraction is missing
+    """
+    # Check that all columns of the patient data and the activities exist, e.g. for referrals sent to the API
+    required_columns = list(PATIENT_DATA_MAPPING.keys()) + \
+        [c for _, flag_column, time_column, _ in ACTIVITIES for c in (flag_column, time_column) if c is not None]
+    missing_columns = [c for c in dict.fromkeys(required_columns) if c not in raw.columns]
+    if missing_columns:
+        raise ValueError(f'The raw data is missing the columns {", ".join(missing_columns)}.')
+
+    # Convert all time columns to datetime
+    time_columns = ['time_referred', 'time_approached', 'time_authorized', 'time_procured']
+    for col in time_columns:
+        raw[col] = pd.to_datetime(raw[col], format='ISO8601')
+
+    # Only keep allowed outcomes
+    allowed_outcomes = ['Transplanted', 'Recovered for Research', 'Recovered for Transplant but not Transplanted']
+    include_outcomes = [c for c in PATIENT_DATA_MAPPING.keys() if c.startswith('outcome_')]
+    for col in include_outcomes:
+        raw[col] = raw[col].astype('category').cat.set_categories(allowed_outcomes)
+
+
+def _finalize_event_log(event_log: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove all cases with missing timestamps from the event log and sort the event log by patient id and time.
+
+    Args:
+        event_log (pd.DataFrame): The unsorted event log
+
+    Returns:
+        (pd.DataFrame): The final event log
+    """
+    # Get cases where a timestamp is missing
+    cases_with_missing_timestamps = event_log[event_log['time:timestamp'].isna()]['case:concept:name'].unique()
+    print(f'Found {len(cases_with_missing_timestamps)} cases with missing timestamps. Removing them ...')
+
+    # Remove cases with missing timestamps
+    event_log = event_log[~event_log['case:concept:name'].isin(cases_with_missing_timestamps)]
+
+    # Sort the event log by patient id and time
+    event_log = event_log.sort_values(by=['case:concept:name', 'time:timestamp'])
+
+    return event_log
+
+
 def extract(raw: pd.DataFrame) -> pd.DataFrame:
     """
-    This function extracts an event log from the raw data.
+    This function extracts an event log from the raw data. Instead of iterating over the rows of the raw data, the
+    events of each activity are selected at once with a boolean mask on the flag column of the activity.
+    The result is identical to the one of [extract_iterative][backend.src.data.extract.extract_iterative].
+
+    Steps:
+        1. Convert all time columns to datetime
+        2. Only keep allowed categories for the outcome columns
+        3. Select the patients of each activity with the flag column of the activity
+        4. Take the patient data and timestamps of all events at once, in the order of the iterative extraction
+        5. Remove cases with missing timestamps
+        6. Sort the event log by patient id and time
+
+
+    Args:
+        raw (pd.DataFrame): The raw data
+
+    Returns:
+        (pd.DataFrame): The extracted event log
+    """
+    return _finalize_event_log(_extract_events(raw))
+
+
+def _extract_events(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extract the events of the raw data without removing cases with missing timestamps and without sorting them, see
+    [extract][backend.src.data.extract.extract].
+
+    Args:
+        raw (pd.DataFrame): The raw data
+
+    Returns:
+        (pd.DataFrame): The events in the order of the raw data
+    """
+    _prepare_raw(raw)
+
+    positions, activities, timestamps = [], [], []
+    for i, (activity, flag_column, time_column, offset) in enumerate(ACTIVITIES):
+        # Add each activity only if its corresponding entry is not False
+        if flag_column is None:
+            mask = np.ones(len(raw), dtype=bool)
+        else:
+            mask = raw[flag_column].astype(bool).to_numpy()
+
+        positions.append(np.flatnonzero(mask))
+        activities.append(np.full(mask.sum(), i))
+        timestamps.append(raw[time_column].to_numpy()[mask] + offset.to_timedelta64())
+
+    positions = np.concatenate(positions)
+    activities = np.concatenate(activities)
+    timestamps = np.concatenate(timestamps)
+
+    # Restore the order of the iterative extraction, i.e. by patient and then by activity
+    order = np.lexsort((activities, positions))
+    positions = positions[order]
+
+    # Collect patient data by mapping the original column names to the new column names
+    event_log = raw[list(PATIENT_DATA_MAPPING.keys())] \
+        .iloc[positions] \
+        .rename(columns=PATIENT_DATA_MAPPING) \
+        .reset_index(drop=True)
+    event_log['concept:name'] = np.array([a for a, _, _, _ in ACTIVITIES], dtype=object)[activities[order]]
+    event_log['time:timestamp'] = timestamps[order]
+
+    # The iterative extraction does not keep the categorical type of the outcome columns
+    outcome_columns = [v for k, v in PATIENT_DATA_MAPPING.items() if k.startswith('outcome_')]
+    event_log[outcome_columns] = event_log[outcome_columns].astype(object).infer_objects()
+
+    columns = ['case:concept:name', 'concept:name', 'time:timestamp'] + list(PATIENT_ATTRIBUTES.keys())
+    return event_log[columns]
+
+
+def extract_iterative(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    This function extracts an event log from the raw data by iterating over all rows. It is kept as a reference for
+    [extract][backend.src.data.extract.extract], which is considerably faster.
 
     Steps:
         1. Convert all time columns to datetime
@@ -56,16 +209,7 @@ def extract(raw: pd.DataFrame) -> pd.DataFrame:
     Returns:
         (pd.DataFrame): The extracted event log
     """
-    # Convert all time columns to datetime
-    time_columns = ['time_referred', 'time_approached', 'time_authorized', 'time_procured']
-    for col in time_columns:
-        raw[col] = pd.to_datetime(raw[col], format='ISO8601')
-
-    # Only keep allowed outcomes
-    allowed_outcomes = ['Transplanted', 'Recovered for Research', 'Recovered for Transplant but not Transplanted']
-    include_outcomes = [c for c in PATIENT_DATA_MAPPING.keys() if c.startswith('outcome_')]
-    for col in include_outcomes:
-        raw[col] = raw[col].astype('category').cat.set_categories(allowed_outcomes)
+    _prepare_raw(raw)
 
     events_list = []
     # Iterate over all rows that correspond to a patient and add all events that happened to the patient to the event list
@@ -73,70 +217,313 @@ def extract(raw: pd.DataFrame) -> pd.DataFrame:
         # Collect patient data by mapping the original column names to the new column names
         patient_data = {v: row[k] for k, v in PATIENT_DATA_MAPPING.items()}
 
-        # Add the referral and evaluation events for each patient as all patients were referred and evaluated
-        events_list.append({'concept:name': 'Referral', 'time:timestamp': row['time_referred']} | patient_data)
+        # Add each activity only if its corresponding entry is not False
+        for activity, flag_column, time_column, offset in ACTIVITIES:
+            if flag_column is None or row[flag_column]:
+                events_list.append(
+                    {'concept:name': activity, 'time:timestamp': row[time_column] + offset} | patient_data)
 
-        # Unfortunately, the evaluation time is not available in the dataset
-        # We assume that the evaluation happens one minute after the referral
-        events_list.append(
-            {'concept:name': 'Evaluation',
-             'time:timestamp': row['time_referred'] + Timedelta(minutes=1)} | patient_data)
+    # Transform the event list to a dataframe
+    columns = ['case:concept:name', 'concept:name', 'time:timestamp'] + list(PATIENT_ATTRIBUTES.keys())
+    event_log = pd.DataFrame(events_list, columns=columns)
+
+    return _finalize_event_log(event_log)
 
-        # Add each activity only if its corresponding entry is not False
-        if row['approached']:
-            events_list.append({'concept:name': 'Approach', 'time:timestamp': row['time_approached']} | patient_data)
 
-        if row['authorized']:
-            events_list.append(
-                {'concept:name': 'Authorization', 'time:timestamp': row['time_authorized']} | patient_data)
+def _merge_bound(runs: list[pd.DataFrame]) -> tuple[object, pd.Timestamp]:
+    """
+    Get the smallest last key of the given sorted runs. No run can contain an event with a smaller key after its
+    buffered events, so all buffered events up to this key can be written.
 
-        if row['procured']:
-            events_list.append({'concept:name': 'Procurement', 'time:timestamp': row['time_procured']} | patient_data)
+    Args:
+        runs (list[pd.DataFrame]): The buffered events of the runs that are not exhausted
 
-        # Unfortunately, the transplant time is not available in the dataset
-        # We assume that the transplant happens one minute after the procurement
-        if row['transplanted']:
-            events_list.append({'concept:name': 'Transplant',
-                                'time:timestamp': row['time_procured'] + Timedelta(minutes=1)} | patient_data)
+    Returns:
+        (tuple[object, pd.Timestamp]): The case id and timestamp of the bound
+    """
+    return min((run['case:concept:name'].iloc[-1], run['time:timestamp'].iloc[-1]) for run in runs)
 
-    # Transform the event list to a dataframe
-    columns = ['case:concept:name', 'concept:name', 'time:timestamp'] + list(PATIENT_ATTRIBUTES.keys())
-    event_log = pd.DataFrame(events_list, columns=columns)
 
-    # Get cases where a timestamp is missing
-    cases_with_missing_timestamps = event_log[event_log['time:timestamp'].isna()]['case:concept:name'].unique()
-    print(f'Found {len(cases_with_missing_timestamps)} cases with missing timestamps. Removing them ...')
+def _merge_runs(run_paths: list[str], output_path: str, excluded_cases: set, block_size: int) -> int:
+    """
+    Merge the sorted runs into one event log sorted by patient id and time. The runs are read in blocks, such that at
+    most one block per run is kept in memory. The events of the excluded cases are removed while merging.
 
-    # Remove cases with missing timestamps
-    event_log = event_log[~event_log['case:concept:name'].isin(cases_with_missing_timestamps)]
+    Args:
+        run_paths (list[str]): The paths to the sorted runs
+        output_path (str): The path to the event log
+        excluded_cases (set): The ids of the cases to remove
+        block_size (int): The number of events that are read from a run at once
 
-    # Sort the event log by patient id and time
-    event_log = event_log.sort_values(by=['case:concept:name', 'time:timestamp'])
+    Returns:
+        (int): The number of events of the event log
+    """
+    readers = [pd.read_csv(path, chunksize=block_size) for path in run_paths]
+    buffers: list[pd.DataFrame | None] = [None] * len(readers)
+    header, count = True, 0
 
-    return event_log
+    with open(output_path, 'w', newline='') as f:
+        while True:
+            # refill the buffers of the runs that were written completely
+            for i, reader in enumerate(readers):
+                if reader is not None and (buffers[i] is None or buffers[i].empty):
+                    block = next(reader, None)
+                    if block is None:
+                        readers[i] = None
+                    else:
+                        block['time:timestamp'] = pd.to_datetime(block['time:timestamp'], format='ISO8601')
+                        buffers[i] = block
+
+            active = [i for i, buffer in enumerate(buffers) if buffer is not None and not buffer.empty]
+            if not active:
+                break
+
+            # once all runs are read completely, the remaining events can be written at once
+            pending = [buffers[i] for i in active if readers[i] is not None]
+            bound = _merge_bound(pending) if pending else None
+
+            blocks = []
+            for i in active:
+                buffer = buffers[i]
+                if bound is None:
+                    mask = np.ones(len(buffer), dtype=bool)
+                else:
+                    case_ids, timestamps = buffer['case:concept:name'], buffer['time:timestamp']
+                    mask = ((case_ids < bound[0]) | ((case_ids == bound[0]) & (timestamps <= bound[1]))).to_numpy()
+                blocks.append(buffer[mask])
+                buffers[i] = buffer[~mask]
+
+            # the stable sort keeps the order of the runs, i.e. the order of the raw data, for equal keys
+            block = pd.concat(blocks).sort_values(by=['case:concept:name', 'time:timestamp'], kind='stable')
+            block = block[~block['case:concept:name'].isin(excluded_cases)]
+
+            block.to_csv(f, header=header, index=False)
+            header, count = False, count + len(block)
+
+    return count
+
+
+def extract_chunked(path: str, output_path: str, chunk_size: int = 1_000_000, workers: int = 1,
+                    partitions: int | None = None) -> int:
+    """
+    This function extracts an event log from the raw data file without loading the whole file into memory. The result
+    is the same as the one of [extract][backend.src.data.extract.extract] written to a csv file.
+    If more than one worker is given, the extraction is run in parallel, see
+    [extract_parallel][backend.src.data.extract.extract_parallel].
+
+    Steps:
+        1. Read the raw data in chunks of the given number of rows
+        2. Extract the events of each chunk and remember the cases with missing timestamps
+        3. Sort the events of each chunk by patient id and time and write them to a temporary run
+        4. Merge the sorted runs, remove the cases with missing timestamps and write the event log block by block
+
+    Args:
+        path (str): The path to the raw data
+        output_path (str): The path to the event log
+        chunk_size (int, optional): The number of rows of the raw data that are read at once. Defaults to 1,000,000.
+        workers (int, optional): The number of worker processes. Defaults to 1.
+        partitions (int, optional): The number of partitions of the parallel extraction. Defaults to the number of
+            workers.
+
+    Returns:
+        (int): The number of events of the event log
+    """
+    if workers > 1:
+        return extract_parallel(path, output_path, workers, chunk_size, partitions)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+
+    # the runs are written next to the event log, as the temporary directory might be too small
+    with tempfile.TemporaryDirectory(dir=output_dir) as run_dir:
+        run_paths, excluded_cases = [], set()
+        for i, raw in enumerate(pd.read_csv(path, chunksize=chunk_size)):
+            events = _extract_events(raw)
+
+            # a case can span multiple chunks, so its events are removed from all runs while merging
+            missing = events.loc[events['time:timestamp'].isna(), 'case:concept:name'].unique()
+            excluded_cases.update(missing)
+
+            events = events[~events['case:concept:name'].isin(missing)] \
+                .sort_values(by=['case:concept:name', 'time:timestamp'])
+            run_paths.append(os.path.join(run_dir, f'run_{i}.csv'))
+            events.to_csv(run_paths[-1], index=False)
+
+        print(f'Found {len(excluded_cases)} cases with missing timestamps. Removing them ...')
+
+        # the blocks of all runs together take about as much memory as one chunk
+        block_size = max(chunk_size // max(len(run_paths), 1), 1000)
+        # write the event log atomically, such that a partially written event log is never used
+        count = _merge_runs(run_paths, f'{output_path}.tmp', excluded_cases, block_size)
+        os.replace(f'{output_path}.tmp', output_path)
+
+    return count
+
+
+def _partition_events(raw: pd.DataFrame, index: int, partitions: int, run_dir: str) \
+        -> tuple[list[tuple[int, int, str]], bool]:
+    """
+    Extract the events of a chunk of the raw data and split them into partitions by the hash of their patient id, such
+    that all events of a case end up in the same partition. The events of each partition are written to a temporary
+    run.
+
+    Args:
+        raw (pd.DataFrame): The chunk of the raw data
+        index (int): The index of the chunk
+        partitions (int): The number of partitions
+        run_dir (str): The directory of the runs
+
+    Returns:
+        (list[tuple[int, int, str]]): The partition, the index of the chunk and the path of each written run
+        (bool): Whether the patient ids are numerical
+    """
+    events = _extract_events(raw)
+
+    # unlike hash, the hash of pandas is the same in all processes
+    partition = pd.util.hash_pandas_object(events['case:concept:name'], index=False).to_numpy() % partitions
+
+    runs = []
+    for p in np.unique(partition):
+        run_path = os.path.join(run_dir, f'run_{p}_{index}.pkl')
+        events[partition == p].to_pickle(run_path)
+        runs.append((int(p), index, run_path))
+
+    return runs, pd.api.types.is_numeric_dtype(events['case:concept:name'].dtype)
+
+
+def _sort_partition(run_paths: list[str], output_path: str) -> tuple[int, int]:
+    """
+    Remove the cases with missing timestamps from a partition, sort it by patient id and time and write it to a csv
+    file. As all events of a case are in the same partition, the partition can be finalized on its own.
+
+    Args:
+        run_paths (list[str]): The paths to the runs of the partition, in the order of the chunks
+        output_path (str): The path to the sorted partition
+
+    Returns:
+        (int): The number of events of the partition
+        (int): The number of removed cases
+    """
+    events = pd.concat([pd.read_pickle(run_path) for run_path in run_paths], ignore_index=True)
+
+    missing = events.loc[events['time:timestamp'].isna(), 'case:concept:name'].unique()
+    events = events[~events['case:concept:name'].isin(missing)] \
+        .sort_values(by=['case:concept:name', 'time:timestamp'])
+    events.to_csv(output_path, index=False)
+
+    return len(events), len(missing)
+
+
+def _merge_partitions(paths: list[str], output_path: str, numerical_ids: bool) -> None:
+    """
+    Merge the sorted partitions into one event log sorted by patient id and time. The cases of the partitions are
+    disjoint, so the rows only have to be compared by their patient id. The rows are copied without converting their
+    values, i.e. the values are formatted like in the partitions.
+
+    Args:
+        paths (list[str]): The paths to the sorted partitions
+        output_path (str): The path to the event log
+        numerical_ids (bool): Whether the patient ids are compared as numbers
+    """
+    with ExitStack() as stack:
+        readers = [csv.reader(stack.enter_context(open(path, newline=''))) for path in paths]
+        header = [next(reader) for reader in readers][0]
+
+        key = (lambda row: float(row[0])) if numerical_ids else (lambda row: row[0])
+        writer = csv.writer(stack.enter_context(open(output_path, 'w', newline='')), lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(heapq.merge(*readers, key=key))
+
+
+def extract_parallel(path: str, output_path: str, workers: int, chunk_size: int = 1_000_000,
+                     partitions: int | None = None) -> int:
+    """
+    This function extracts an event log from the raw data file with a pool of worker processes. The result is the same
+    as the one of [extract_chunked][backend.src.data.extract.extract_chunked] and does not depend on the number of
+    workers, as long as the number of partitions is the same.
+
+    Steps:
+        1. Read the raw data in chunks of the given number of rows
+        2. Extract the events of each chunk in a worker and split them into partitions by the hash of the patient id
+        3. Remove the cases with missing timestamps from each partition and sort it in a worker
+        4. Merge the sorted partitions into the event log
+
+    As every partition is sorted in memory, about `workers / partitions` of the event log is kept in memory at once.
+    More partitions than workers can be used to extract raw data that is larger than the memory.
+
+    Args:
+        path (str): The path to the raw data
+        output_path (str): The path to the event log
+        workers (int): The number of worker processes
+        chunk_size (int, optional): The number of rows of the raw data that are read at once. Defaults to 1,000,000.
+        partitions (int, optional): The number of partitions. Defaults to the number of workers.
+
+    Returns:
+        (int): The number of events of the event log
+    """
+    partitions = partitions or workers
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as run_dir, ProcessPoolExecutor(workers) as executor:
+        runs, numerical_ids = [], False
+
+        def collect(futures):
+            nonlocal numerical_ids
+            for future in futures:
+                chunk_runs, numerical = future.result()
+                runs.extend(chunk_runs)
+                numerical_ids |= numerical
+
+        pending = set()
+        for i, raw in enumerate(pd.read_csv(path, chunksize=chunk_size)):
+            # limit the number of chunks in flight, such that the raw data is not read faster than it is extracted
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(_partition_events, raw, i, partitions, run_dir))
+        collect(wait(pending).done)
+
+        # the runs of each partition are concatenated in the order of the chunks, like in the serial extraction
+        partition_runs = {}
+        for p, _, run_path in sorted(runs):
+            partition_runs.setdefault(p, []).append(run_path)
+
+        partition_paths = {p: os.path.join(run_dir, f'partition_{p}.csv') for p in partition_runs}
+        futures = [executor.submit(_sort_partition, partition_runs[p], partition_paths[p]) for p in partition_runs]
+        results = [future.result() for future in futures]
+        print(f'Found {sum(m for _, m in results)} cases with missing timestamps. Removing them ...')
+
+        # write the event log atomically, such that a partially written event log is never used
+        _merge_partitions(list(partition_paths.values()), f'{output_path}.tmp', numerical_ids)
+        os.replace(f'{output_path}.tmp', output_path)
+
+    return sum(c for c, _ in results)
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract the event log from the ORCHID dataset.')
+    parser.add_argument('--workers', type=int, default=1, help='The number of worker processes.')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                        help='The number of rows of the raw data that are read at once.')
+    args = parser.parse_args()
+
     print('Extracting the event log ...')
     # Check if the event log already exists
-    try:
-        pd.read_csv(CLEAN_EVENT_LOG_PATH)
+    if os.path.exists(CLEAN_EVENT_LOG_PATH):
         print('The event log already exists. Skipping extraction.')
+        # Make sure that the columnar event log is up to date with the existing event log
+        load_event_log(CLEAN_EVENT_LOG_PATH, COLUMNAR_EVENT_LOG_PATH)
         exit(0)
-    except FileNotFoundError:
-        pass
 
-    # Load the data
+    # Extract the event log chunk by chunk, such that the raw data does not have to fit into memory
     path = f'{ROOT_DIR}/backend/data/raw/{RAW_DATASET}'
     try:
-        df = pd.read_csv(path)
+        extract_chunked(path, CLEAN_EVENT_LOG_PATH, chunk_size=args.chunk_size, workers=args.workers)
     except FileNotFoundError:
         print(
             f'The ORCHID dataset was not found at {path}. Please download the dataset and place it in the data/raw '
             f'folder.')
         exit(1)
 
-    event_log = extract(df)
-
-    # Save the event log
-    event_log.to_csv(CLEAN_EVENT_LOG_PATH, index=False)
+    # Save the columnar event log, which is loaded by the service without parsing the event log again
+    print('Writing the columnar event log ...')
+    load_event_log(CLEAN_EVENT_LOG_PATH, COLUMNAR_EVENT_LOG_PATH)
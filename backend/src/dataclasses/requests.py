@@ -65,6 +65,23 @@ class KpiRequest(FilteredRequest):
     legend_attribute: DisaggregationAttribute | None = None
 
 
+@dataclass
+class KpiBatchRequest(FilteredRequest):
+    """
+    A request for multiple KPIs. Every KPI will be calculated for every disaggregation attribute, such that the event
+    log only has to be filtered once for all of them.
+
+    Attributes:
+        filters (list[BaseFilter] | None): The filters of the request. Defaults to None.
+        kpis (list[KpiType]): The KPIs to request.
+        disaggregation_attributes (list[DisaggregationAttribute]): The attributes to disaggregate the KPIs by.
+        legend_attribute (DisaggregationAttribute | None): The attribute to display the KPIs in the legend by. Defaults to None.
+    """
+    kpis: list[KpiType]
+    disaggregation_attributes: list[DisaggregationAttribute]
+    legend_attribute: DisaggregationAttribute | None = None
+
+
 @dataclass
 class DistributionRequest(FilteredRequest):
     """
@@ -0,0 +1,201 @@
+import dataclasses
+import enum
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+
+from flask_caching.backends.base import BaseCache
+
+from backend.src.dataclasses.requests import FilteredRequest
+from backend.src.process_mining.filter_cache import get_filter_key
+
+
+def _encode(o: object) -> object:
+    """
+    Encode the objects of a request that are not supported by the json module.
+
+    Args:
+        o (object): The object.
+
+    Returns:
+        (object): The encodable object.
+    """
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if isinstance(o, enum.Enum):
+        return o.value
+    raise TypeError(f'Object of type {type(o).__name__} is not supported.')
+
+
+def get_digest(data: object) -> str:
+    """
+    Get a stable digest of the given data. Unlike `hash`, the digest is the same in all processes and after restarts.
+    The data is serialized with sorted keys, such that the order of the keys of dictionaries does not matter.
+
+    Args:
+        data (object): The data, which must be serializable to json.
+
+    Returns:
+        (str): The hexadecimal BLAKE2 digest.
+    """
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=_encode)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def get_request_digest(request: FilteredRequest) -> str:
+    """
+    Get a stable digest of the canonical form of the given request. The filters are replaced by their
+    [canonical key][backend.src.process_mining.filter_cache.get_filter_key], such that requests that only differ in
+    the order of their filters or values have the same digest.
+
+    Args:
+        request (FilteredRequest): The request.
+
+    Returns:
+        (str): The hexadecimal BLAKE2 digest.
+    """
+    canonical = {field.name: getattr(request, field.name) for field in dataclasses.fields(request)}
+    canonical['filters'] = get_filter_key(request.filters or [])
+
+    return get_digest({'type': type(request).__name__, 'request': canonical})
+
+
+class SQLiteCache(BaseCache):
+    """
+    A result cache that is stored in a SQLite database, such that all processes on one host share the cached results.
+    The values are pickled and compressed with zlib. If the number of entries or the total size of the compressed
+    values exceeds the bounds, the least recently used entries are removed. The entries are ordered by the time of their
+    last access, which all processes can set without reading the other entries.
+
+    The cache is selected with `CACHE_TYPE = 'backend.src.flask.cache.SQLiteCache'`. The database is configured with
+    `CACHE_SQLITE_PATH`, the bounds with `CACHE_THRESHOLD` and `CACHE_MAX_BYTES`.
+
+    Attributes:
+        path (str): The path of the database.
+        threshold (int): The maximum number of entries.
+        max_bytes (int): The maximum total size of the compressed values in bytes.
+        compress_level (int): The zlib compression level.
+    """
+
+    def __init__(self, path: str, threshold: int = 1000, max_bytes: int = 256 * 1024 * 1024,
+                 default_timeout: int = 300, compress_level: int = 6):
+        super().__init__(default_timeout=default_timeout)
+        self.path: str = path
+        self.threshold: int = threshold
+        self.max_bytes: int = max_bytes
+        self.compress_level: int = compress_level
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                         'size INTEGER NOT NULL, expires REAL NOT NULL, accessed INTEGER NOT NULL)')
+            # the least recently used entries are found without scanning the table
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            path=config['CACHE_SQLITE_PATH'],
+            threshold=config['CACHE_THRESHOLD'],
+            max_bytes=config.get('CACHE_MAX_BYTES', 256 * 1024 * 1024),
+        )
+        return cls(*args, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        # connections are not shared between threads, so every operation opens its own connection
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _expires(self, timeout: int | None) -> float:
+        timeout = self._normalize_timeout(timeout)
+        # a timeout of 0 means that the entry never expires
+        return float('inf') if timeout == 0 else time.time() + timeout
+
+    def get(self, key: str) -> object | None:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (time.time_ns(), key))
+
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value: object, timeout: int | None = None) -> bool:
+        return self._store(key, value, timeout, replace=True)
+
+    def add(self, key: str, value: object, timeout: int | None = None) -> bool:
+        return self._store(key, value, timeout, replace=False)
+
+    def _store(self, key: str, value: object, timeout: int | None, replace: bool) -> bool:
+        """
+        Store the given value and remove the least recently used entries if the cache exceeds its bounds.
+
+        Args:
+            key (str): The key.
+            value (object): The value.
+            timeout (int | None): The timeout in seconds.
+            replace (bool): Whether an existing entry that has not expired is replaced.
+
+        Returns:
+            (bool): Whether the value was stored.
+        """
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.compress_level)
+        if len(data) > self.max_bytes:
+            return False
+
+        with closing(self._connect()) as conn, conn:
+            now = time.time()
+            if not replace and conn.execute('SELECT 1 FROM cache WHERE key = ? AND expires > ?',
+                                            (key, now)).fetchone():
+                return False
+
+            conn.execute('INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                         (key, data, len(data), self._expires(timeout), time.time_ns()))
+            self._prune(conn, now)
+
+        return True
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """
+        Remove the expired entries and the least recently used entries until the cache is within its bounds.
+
+        Args:
+            conn (sqlite3.Connection): The connection of the current transaction.
+            now (float): The current time.
+        """
+        conn.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        if count <= self.threshold and total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM cache ORDER BY accessed'):
+            if count <= self.threshold and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany('DELETE FROM cache WHERE key = ?', evicted)
+
+    def delete(self, key: str) -> bool:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def has(self, key: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT 1 FROM cache WHERE key = ? AND expires > ?',
+                                (key, time.time())).fetchone() is not None
+
+    def clear(self) -> bool:
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM cache')
+        return True
@@ -0,0 +1,113 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable
+
+
+class LimitExceeded(Exception):
+    """
+    Raised if a request is rejected because all workers of the endpoint are busy and its queue is full.
+    """
+    pass
+
+
+class ExecutionTimeout(Exception):
+    """
+    Raised if the result of a request is not available within the timeout of the endpoint.
+    """
+    pass
+
+
+class EndpointExecutor:
+    """
+    A bounded execution layer for the computations of one endpoint. The computations run on a pool of worker threads,
+    such that at most `max_workers` computations of the endpoint run at once. At most `max_queue` further computations
+    wait for a worker, any further request is rejected immediately with
+    [LimitExceeded][backend.src.flask.limits.LimitExceeded] instead of waiting. If the result is not available within
+    the timeout, [ExecutionTimeout][backend.src.flask.limits.ExecutionTimeout] is raised and the computation is
+    cancelled if it has not started yet. Computations that already run cannot be interrupted, they keep their worker
+    until they are finished.
+
+    Attributes:
+        name (str): The name of the endpoint.
+        max_workers (int): The maximum number of computations that run at once.
+        max_queue (int): The maximum number of computations that wait for a worker.
+        timeout (float | None): The timeout in seconds or None to wait without timeout.
+        rejected (int): The number of rejected requests.
+        timeouts (int): The number of requests that timed out.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float | None = None):
+        self.name: str = name
+        self.max_workers: int = max_workers
+        self.max_queue: int = max_queue
+        self.timeout: float | None = timeout
+        self.rejected: int = 0
+        self.timeouts: int = 0
+
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=f'endpoint-{name}')
+        self._pending: int = 0
+        self._running: int = 0
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable, *args, **kwargs) -> object:
+        """
+        Run the given function on a worker of the endpoint and wait for its result.
+
+        Args:
+            fn (Callable): The function.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            (object): The result of the function.
+
+        Raises:
+            LimitExceeded: If all workers are busy and the queue is full.
+            ExecutionTimeout: If the result is not available within the timeout.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise LimitExceeded(f'Too many concurrent requests to {self.name}.')
+            self._pending += 1
+
+        def task():
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        future = self._executor.submit(task)
+        # the slot is released once the computation is finished or cancelled
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise ExecutionTimeout(f'The request to {self.name} timed out after {self.timeout} seconds.')
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the statistics of the endpoint.
+
+        Returns:
+            (dict[str, int]): The numbers of running, queued, rejected and timed out requests.
+        """
+        with self._lock:
+            return {
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+            }
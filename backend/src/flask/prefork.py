@@ -0,0 +1,98 @@
+import os
+import signal
+import socket
+from typing import Callable
+
+from flask import Flask
+from waitress import serve
+
+"""
+A pre-fork server for the dashboard. The application, including the event log of the process mining service, is loaded
+once by the parent process before the worker processes are forked. The workers share the memory of the event log with
+the parent: the columns that are read from the columnar store are memory-mapped, the remaining memory is shared
+copy-on-write. All workers accept connections on the same listening socket, such that the requests are distributed
+over all cores instead of sharing the GIL of a single process.
+"""
+
+
+def _start_worker(app: Flask, sock: socket.socket, worker: int, post_fork: Callable[[int], None] | None = None,
+                  **kwargs) -> int:
+    """
+    Fork a worker process that serves the application on the given socket.
+
+    Args:
+        app (Flask): The application.
+        sock (socket.socket): The listening socket.
+        worker (int): The number of the worker.
+        post_fork (Callable[[int], None] | None): A function that is called with the number of the worker in the worker
+            before it serves the application.
+        **kwargs: The arguments of the waitress server.
+
+    Returns:
+        (int): The process id of the worker.
+    """
+    pid = os.fork()
+    if pid == 0:
+        # the worker stops on the signals that the parent forwards, instead of handling them like the parent
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            if post_fork is not None:
+                post_fork(worker)
+            serve(app, sockets=[sock], **kwargs)
+        finally:
+            os._exit(0)
+
+    return pid
+
+
+def serve_prefork(app: Flask, host: str, port: int, workers: int, post_fork: Callable[[int], None] | None = None,
+                  **kwargs):
+    """
+    Serve the application with the given number of worker processes. Workers that exit unexpectedly are replaced. On
+    SIGTERM or SIGINT, the workers are stopped and the function returns once all workers have exited.
+
+    Args:
+        app (Flask): The application.
+        host (str): The host to listen on.
+        port (int): The port to listen on.
+        workers (int): The number of worker processes.
+        post_fork (Callable[[int], None] | None): A function that is called in every worker before it serves the
+            application, e.g. to start background threads, which are not inherited by the forked workers. It is called
+            with the number of the worker from 0 to workers - 1, which a replacement worker takes over, such that
+            e.g. a task that must only run once can be started in worker 0.
+        **kwargs: The arguments of the waitress server, e.g. the number of threads per worker.
+    """
+    sock = socket.create_server((host, port), backlog=1024)
+    sock.set_inheritable(True)
+
+    stopping = False
+    # the number of the worker of every process
+    pids = {}
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for worker in range(workers):
+        pids[_start_worker(app, sock, worker, post_fork, **kwargs)] = worker
+
+    while pids:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        worker = pids.pop(pid, None)
+        if not stopping and worker is not None:
+            print(f'Worker {pid} exited unexpectedly. Starting a new worker ...')
+            pids[_start_worker(app, sock, worker, post_fork, **kwargs)] = worker
+
+    sock.close()
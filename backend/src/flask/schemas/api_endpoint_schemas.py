@@ -1,7 +1,8 @@
 from marshmallow import Schema, fields, validates_schema, post_load, ValidationError, pre_load
+from marshmallow.validate import Length
 
 from backend.src.dataclasses.requests import VariantListRequest, KpiRequest, KpiType, DistributionRequest, DfgRequest, \
-                                            DejureStatisticType, DejureGraphRequest
+                                            DejureStatisticType, DejureGraphRequest, KpiBatchRequest
 from backend.src.flask.schemas.attributes_schema import DisaggregationAttributeSchema
 from backend.src.flask.schemas.filter_schemas import CategoryFilterSchema, NumericalFilterSchema
 
@@ -46,6 +47,30 @@ class KpiSchema(FilteredRequestSchema):
         return KpiRequest(**data)
 
 
+class KpiBatchSchema(FilteredRequestSchema):
+    kpis = fields.List(fields.Enum(enum=KpiType), required=True, validate=Length(min=1))
+    legend_attribute = fields.Nested(DisaggregationAttributeSchema, required=False)
+    disaggregation_attributes = fields.List(fields.Nested(DisaggregationAttributeSchema), required=True,
+                                            validate=Length(min=1))
+
+    @validates_schema
+    def ensure_different_attributes(self, data, **kwargs):
+        if 'legend_attribute' in data and any(data['legend_attribute'].name == attribute.name
+                                              for attribute in data['disaggregation_attributes']):
+            raise ValidationError('The legend attribute and the disaggregation attributes must be different.')
+
+    @validates_schema
+    def ensure_unique_attributes(self, data, **kwargs):
+        # the results are keyed by the name of the disaggregation attribute
+        names = [attribute.name for attribute in data.get('disaggregation_attributes', [])]
+        if len(names) != len(set(names)):
+            raise ValidationError('The disaggregation attributes must be unique.')
+
+    @post_load
+    def make_kpi_batch_request(self, data, **kwargs):
+        return KpiBatchRequest(**data)
+
+
 class DistributionSchema(FilteredRequestSchema):
     disaggregation_attribute = fields.Nested(DisaggregationAttributeSchema, required=True)
 
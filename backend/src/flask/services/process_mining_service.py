@@ -1,26 +1,162 @@
+import io
+import os
+import threading
+
+import numpy as np
 import pandas as pd
 
+from backend.src.data.extract import extract
 from backend.src.dataclasses.attributes import PatientAttribute
 from backend.src.dataclasses.charts import (DataSeries, Graph, MultiDataSeries,
                                             Variant)
+from backend.src.dataclasses.filters import BaseFilter
 from backend.src.dataclasses.requests import (DejureGraphRequest,
                                               DejureStatisticType, DfgRequest,
                                               DistributionRequest, KpiRequest,
-                                              KpiType, VariantListRequest)
+                                              KpiBatchRequest, KpiType,
+                                              VariantListRequest)
 from backend.src.process_mining import dejure, dfg, distribution, kpi
-from backend.src.process_mining.event_log import (create_bins, filter_log,
+from backend.src.process_mining.event_log import (EventLog, append_event_log,
+                                                  create_bins,
+                                                  create_event_log,
                                                   load_event_log,
                                                   load_filter_attributes,
-                                                  load_patient_attributes)
+                                                  load_patient_attributes,
+                                                  write_columnar_event_log)
+from backend.src.process_mining.filter_cache import FilterCache
 from backend.src.process_mining.variants import get_variants_with_frequencies
-from definitions import CLEAN_EVENT_LOG_PATH
+from definitions import CLEAN_EVENT_LOG_PATH, COLUMNAR_EVENT_LOG_PATH
+
+
+def get_data_version(path: str) -> str:
+    """
+    Get the version of the event log file from its size and modification time. Unlike the generations of the service,
+    the version is durable, i.e. it is the same after a restart as long as the file does not change.
+
+    Args:
+        path (str): The path to the event log file.
+
+    Returns:
+        (str): The version of the event log file.
+    """
+    stat = os.stat(path)
+    return f'{stat.st_size}-{stat.st_mtime_ns}'
 
 
 class ProcessMiningService:
-    def __init__(self):
-        self.event_log: pd.DataFrame = load_event_log(CLEAN_EVENT_LOG_PATH)
+    def __init__(self, path: str = CLEAN_EVENT_LOG_PATH, columnar_path: str | None = COLUMNAR_EVENT_LOG_PATH):
+        self.path: str = path
+        self.columnar_path: str | None = columnar_path
+        self.event_log: EventLog = load_event_log(path, columnar_path)
+        # build the filter index upfront instead of on the first request
+        self.event_log.filter_index
         self.patient_attributes: list[PatientAttribute] = load_patient_attributes(self.event_log)
         self.filter_attributes: list[PatientAttribute] = load_filter_attributes(self.event_log)
+        self.filter_cache: FilterCache = FilterCache()
+
+        # the generation is increased with every appended batch of referrals, see get_generation
+        self.generation: int = 0
+        self.category_generation: int = 0
+        # the version of the event log file after every generation, see get_version
+        self._versions: list[str] = [get_data_version(path)]
+        # the generation of every case, which is replaced together with the event log it belongs to
+        self._case_generations: tuple[EventLog, np.ndarray] = \
+            (self.event_log, np.zeros(len(self.event_log.cases), dtype=np.int32))
+        self._append_lock = threading.Lock()
+
+    def get_generation(self, filters: list[BaseFilter]) -> int:
+        """
+        Get the generation of the data that is selected by the given filters, i.e. the last batch of appended referrals
+        that changed the result of requests with these filters. Results can be cached by their request and this
+        generation, such that appending referrals only invalidates the results of the affected filters.
+
+        Args:
+            filters (list[BaseFilter]): The filters.
+
+        Returns:
+            (int): The generation.
+        """
+        if self.generation == 0:
+            return 0
+
+        el, case_generations = self._case_generations
+        mask = el.filter_index.resolve(filters)
+        return max(self.category_generation, int(case_generations[mask].max(initial=0)))
+
+    def get_version(self, filters: list[BaseFilter] | None = None) -> str:
+        """
+        Get the version of the data that is selected by the given filters, i.e. the version of the event log file after
+        the generation of the filters, see [get_generation][backend.src.flask.services.process_mining_service.
+        ProcessMiningService.get_generation]. Unlike the generation, the version identifies the data across restarts,
+        so it can be used to key results in a persistent cache: after a restart, all filters have the version of the
+        current event log file, which is the version of the last generation before the restart.
+
+        Args:
+            filters (list[BaseFilter], optional): The filters or None for the whole event log. Defaults to None.
+
+        Returns:
+            (str): The version.
+        """
+        if filters is None:
+            return self._versions[self.generation]
+        return self._versions[self.get_generation(filters)]
+
+    def append_referrals(self, raw: pd.DataFrame) -> int:
+        """
+        Append new referrals to the event log without loading the event log again. The events of the referrals are
+        extracted and appended to the event log file, the columnar store and the loaded event log. The attributes are
+        updated and only the filtered event logs that contain new cases are removed from the filter cache.
+
+        Args:
+            raw (pd.DataFrame): The referrals in the format of the raw data, see
+                [extract][backend.src.data.extract.extract].
+
+        Returns:
+            (int): The number of appended cases.
+        """
+        events = extract(raw)
+        if events.empty:
+            return 0
+
+        with self._append_lock:
+            # the new events are parsed from their csv representation, like the events of the event log file
+            header = pd.read_csv(self.path, nrows=0).columns
+            text = events[header].to_csv(index=False)
+            delta = create_event_log(pd.read_csv(io.StringIO(text)))
+            el = append_event_log(self.event_log, delta)
+
+            with open(self.path, 'a') as f:
+                f.write(text.split('\n', 1)[1])
+            version = get_data_version(self.path)
+            if self.columnar_path is not None:
+                write_columnar_event_log(el, self.path, self.columnar_path)
+
+            # results that depend on all values of a category, like distributions, change if a category is added
+            categories_changed = any(
+                len(column.cat.categories) != len(self.event_log.cases[name].cat.categories)
+                for name, column in el.cases.items() if isinstance(column.dtype, pd.CategoricalDtype)
+            ) or len(el.cases.columns) != len(self.event_log.cases.columns)
+
+            generation = self.generation + 1
+            new_cases = el.cases['case:concept:name'].isin(delta.cases['case:concept:name']).to_numpy()
+            case_generations = np.empty(len(el.cases), dtype=np.int32)
+            case_generations[new_cases] = generation
+            case_generations[~new_cases] = self._case_generations[1]
+
+            el.filter_index
+            el.traces
+            # the version is added before any state refers to the new generation
+            self._versions.append(version)
+            self.filter_cache.append(el, delta, clear=categories_changed)
+            self.patient_attributes = load_patient_attributes(el)
+            self.filter_attributes = load_filter_attributes(el)
+            self.event_log = el
+            self._case_generations = (el, case_generations)
+            if categories_changed:
+                self.category_generation = generation
+            self.generation = generation
+
+        return len(delta.cases)
 
     def get_patient_attributes(self) -> list[PatientAttribute]:
         return self.patient_attributes
@@ -28,24 +164,45 @@ class ProcessMiningService:
     def get_process_attributes(self) -> list[PatientAttribute]:
         return self.filter_attributes
 
+    def get_filter_cache_stats(self) -> dict[str, int]:
+        return self.filter_cache.stats()
+
     def get_variants(self, request: VariantListRequest) -> list[Variant]:
-        el = filter_log(self.event_log, request.filters)
+        el = self.filter_cache.get(self.event_log, request.filters)
         el, dac = create_bins(el, request.disaggregation_attribute)
 
         return get_variants_with_frequencies(el, dac)
 
     def get_attribute_distribution(self, request: DistributionRequest) -> DataSeries:
-        el = filter_log(self.event_log, request.filters)
+        el = self.filter_cache.get(self.event_log, request.filters)
         el, dac = create_bins(el, request.disaggregation_attribute)
 
         return distribution.attribute_distribution(el, dac)
 
     def get_kpi_data(self, request: KpiRequest) -> MultiDataSeries:
-        el = filter_log(self.event_log, request.filters)
+        el = self.filter_cache.get(self.event_log, request.filters)
         el, dac = create_bins(el, request.disaggregation_attribute)
         el, lac = create_bins(el, request.legend_attribute)
 
-        match request.kpi:
+        return self._get_kpi(request.kpi, el, dac, lac)
+
+    def get_kpi_batch(self, request: KpiBatchRequest) -> dict[str, dict[str, MultiDataSeries]]:
+        # the event log is filtered and binned by the legend only once for all KPIs
+        el = self.filter_cache.get(self.event_log, request.filters)
+        el, lac = create_bins(el, request.legend_attribute)
+
+        result = {}
+        for disaggregation_attribute in request.disaggregation_attributes:
+            disaggregated_el, dac = create_bins(el, disaggregation_attribute)
+            # the KPIs are keyed by their names, like in the request
+            result[dac] = {kpi_type.name: self._get_kpi(kpi_type, disaggregated_el, dac, lac)
+                           for kpi_type in request.kpis}
+
+        return result
+
+    @staticmethod
+    def _get_kpi(kpi_type: KpiType, el: EventLog, dac: str, lac: str | None) -> MultiDataSeries:
+        match kpi_type:
             case KpiType.HAPPY_PATH_ADHERENCE:
                 return kpi.get_happy_path_adherence(el, dac, lac)
             case KpiType.DROP_OUT:
@@ -62,11 +219,11 @@ class ProcessMiningService:
                 raise ValueError('The given KPI is not supported.')
 
     def get_dfg(self, request: DfgRequest) -> Graph:
-        el = filter_log(self.event_log, request.filters)
+        el = self.filter_cache.get(self.event_log, request.filters)
         return dfg.get_dfg(el)
 
     def get_dejure_graph(self, request: DejureGraphRequest) -> Graph:
-        el = filter_log(self.event_log, request.filters)
+        el = self.filter_cache.get(self.event_log, request.filters)
 
         el, dac = create_bins(el, request.disaggregation_attribute)
 
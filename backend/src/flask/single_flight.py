@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+
+class SingleFlight:
+    """
+    Deduplicates identical computations that run at the same time. The first call with a key runs the computation,
+    every call with the same key that arrives before the computation is finished waits for it and shares its result or
+    its exception. Once the computation is finished, the key is forgotten, so later calls run the computation again,
+    e.g. after the cached result expired.
+
+    Attributes:
+        calls (int): The number of computations that were run.
+        shared (int): The number of calls that shared the result of a running computation.
+    """
+
+    def __init__(self):
+        self.calls: int = 0
+        self.shared: int = 0
+
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> object:
+        """
+        Run the given function or wait for the running computation with the same key.
+
+        Args:
+            key (str): The key of the computation, e.g. the cache key of the request.
+            fn (Callable): The function.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            (object): The result of the function. The result is shared between the callers and must not be modified.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[key]
@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+import uuid
+
+from flask import Flask
+from flask_caching import Cache
+
+from backend.src.dataclasses.attributes import AttributeType
+from backend.src.dataclasses.requests import DejureStatisticType, KpiType
+from definitions import PATIENT_ATTRIBUTES
+
+# the bins that the dashboard uses for numerical attributes by default
+DEFAULT_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+
+
+def get_default_warmup_requests() -> list[tuple[str, dict]]:
+    """
+    Get the requests that the dashboard sends when it is opened: every patient attribute as disaggregation attribute
+    without filters, for the variants, all KPIs, the distributions, the DFG and all statistics of the dejure graph.
+
+    Returns:
+        (list[tuple[str, dict]]): The paths of the endpoints and the json bodies of the requests.
+    """
+    requests = []
+    for name, attribute_type in PATIENT_ATTRIBUTES.items():
+        attribute = {'name': name}
+        if attribute_type == AttributeType.NUMERICAL:
+            attribute['bins'] = DEFAULT_BINS
+
+        body = {'categorical_filters': [], 'numerical_filters': [], 'disaggregation_attribute': attribute}
+        requests.append(('/variants', body))
+        requests += [('/kpi', {**body, 'kpi': kpi_type.name}) for kpi_type in KpiType]
+        requests.append(('/distributions', body))
+        requests.append(('/dfg', body))
+        requests += [('/dejure', {**body, 'statistic': statistic.name}) for statistic in DejureStatisticType]
+
+    return requests
+
+
+def load_warmup_requests(path: str) -> list[tuple[str, dict]]:
+    """
+    Load the requests of the warm-up from a json file, which contains a list of objects with the path of the endpoint
+    and the body of the request, e.g. `[{"path": "/dfg", "body": {...}}]`.
+
+    Args:
+        path (str): The path to the json file.
+
+    Returns:
+        (list[tuple[str, dict]]): The paths of the endpoints and the json bodies of the requests.
+    """
+    with open(path) as f:
+        return [(item['path'], item['body']) for item in json.load(f)]
+
+
+class WarmUp:
+    """
+    Precomputes the results of a list of requests in the background, such that the first users of the dashboard do not
+    wait for the computations. The requests are sent through the application, so the results are stored in the result
+    cache under the same keys as the results of the users' requests, and requests of users that arrive during the
+    warm-up share the running computation. The server answers requests while the warm-up runs, but it is only reported
+    as ready once the warm-up is finished, see [ready][backend.src.flask.warmup.WarmUp.ready].
+
+    If the result cache is shared between processes, the warm-up only needs to run in one of them. The progress is then
+    stored in the cache as well, such that the processes that do not run the warm-up report the progress of the process
+    that does. The processes must be forked from the process that created the warm-up, as they identify the progress
+    by the id of the warm-up.
+
+    Attributes:
+        app (Flask): The application.
+        requests (list[tuple[str, dict]]): The paths of the endpoints and the json bodies of the requests.
+        cache (Cache | None): The result cache, if the progress is shared through it.
+        done (int): The number of requests that are finished.
+        failed (int): The number of finished requests that did not succeed.
+    """
+
+    def __init__(self, app: Flask, requests: list[tuple[str, dict]], cache: Cache | None = None):
+        self.app: Flask = app
+        self.requests: list[tuple[str, dict]] = requests
+        self.cache: Cache | None = cache
+        self.done: int = 0
+        self.failed: int = 0
+
+        self._key: str = f'warmup_{uuid.uuid4().hex}'
+        self._started: float | None = None
+        self._finished: float | None = None
+        self._shared: dict[str, int | float | bool] | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """
+        Start the warm-up in a background thread.
+        """
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """
+        Send the requests one after another, such that the warm-up only takes one worker of each endpoint.
+        """
+        if self._started is None:
+            self._started = time.monotonic()
+
+        client = self.app.test_client()
+        for path, body in self.requests:
+            try:
+                response = client.post(path, json=body)
+                succeeded = response.status_code == 200
+            except Exception:
+                succeeded = False
+
+            self.failed += not succeeded
+            self.done += 1
+            self._publish()
+
+        self._finished = time.monotonic()
+        self._publish()
+
+    def join(self, timeout: float | None = None):
+        """
+        Wait for the warm-up to finish.
+
+        Args:
+            timeout (float | None): The timeout in seconds or None to wait without timeout.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def ready(self) -> bool:
+        """
+        Returns whether the warm-up is finished, which is also the case if there are no requests.
+
+        Returns:
+            (bool): Whether the warm-up is finished.
+        """
+        return self.stats()['finished']
+
+    def stats(self) -> dict[str, int | float | bool]:
+        """
+        Returns the progress of the warm-up. If the warm-up was not started in this process, the progress of the
+        process that shares the cache and runs the warm-up is returned, as far as it is known.
+
+        Returns:
+            (dict[str, int | float | bool]): The numbers of all, finished and failed requests, whether the warm-up is
+                finished and the seconds it has run.
+        """
+        if self._started is None and self.cache is not None and self.requests:
+            # the progress does not change anymore once the warm-up is finished
+            if self._shared is None or not self._shared['finished']:
+                self._shared = self.cache.get(self._key)
+            if self._shared is not None:
+                return self._shared
+
+        return self._get_stats()
+
+    def _get_stats(self) -> dict[str, int | float | bool]:
+        finished = self._finished is not None or not self.requests
+        if self._started is None:
+            seconds = 0.0
+        else:
+            seconds = (self._finished if self._finished is not None else time.monotonic()) - self._started
+
+        return {
+            'total': len(self.requests),
+            'done': self.done,
+            'failed': self.failed,
+            'finished': finished,
+            'seconds': round(seconds, 3),
+        }
+
+    def _publish(self):
+        if self.cache is None:
+            return
+
+        try:
+            # the progress never expires, as the other processes report it until the server stops
+            self.cache.set(self._key, self._get_stats(), timeout=0)
+        except Exception:
+            # the warm-up continues without sharing its progress
+            pass
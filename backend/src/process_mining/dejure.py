@@ -1,62 +1,110 @@
-import pandas as pd
-from pm4py.filtering import filter_variants
-from pm4py.discovery import discover_dfg, discover_performance_dfg
-from backend.src.dataclasses.charts import Graph, Edge, Node
-
+import numpy as np
 
-DE_JURE_VARIANT = ('Referral', 'Evaluation', 'Approach', 'Authorization', 'Procurement', 'Transplant')
+from backend.src.dataclasses.charts import Graph, Edge, Node
+from backend.src.process_mining.dfg import discover_grouped_dfg, discover_grouped_performance_dfg
+from backend.src.process_mining.event_log import EventLog
 
 
-def get_dejure_variant(el: pd.DataFrame) -> pd.DataFrame:
+def get_dejure_variant(el: EventLog) -> EventLog:
     """
-     Extracts the dejure variants from the input DataFrame.
+     Extracts the cases of the dejure variants, i.e. of all prefixes of the dejure variant, from the event log.
+     The cases are selected by their precomputed dejure prefix length.
 
      Args:
-         el (pd.DataFrame): The event log.
+         el (EventLog): The event log.
 
      Returns:
-         pd.DataFrame: A DataFrame representing all cease of the dejure variants.
+         EventLog: An event log of all cases of the dejure variants.
      """
-    # compute the variants to filter
-    dejure_list = [DE_JURE_VARIANT[:i + 1] for i in range(len(DE_JURE_VARIANT))]
+    return el.select(el.cases['dejure_prefix_length'].to_numpy() > 0)
+
+
+def get_case_groups(el: EventLog, disaggregation_column: str) -> tuple[np.ndarray, list]:
+    """
+    Get the group of every case, i.e. the code of its value of the disaggregation column.
+
+    Args:
+        el (EventLog): The event log.
+        disaggregation_column (str): Disaggregation attribute column.
+
+    Returns:
+        (np.ndarray): The group of every case or -1 for cases without value.
+        (list): The value of every group.
+    """
+    column = el.cases[disaggregation_column].astype('category')
+    return column.cat.codes.to_numpy().astype(np.intp), column.cat.categories.tolist()
+
+
+def get_dejure_case_groups(el: EventLog, disaggregation_column: str) -> tuple[np.ndarray, list]:
+    """
+    Get the group of every case of the dejure variants, i.e. of all prefixes of the dejure variant, like
+    [get_case_groups][backend.src.process_mining.dejure.get_case_groups]. All other cases have no group.
 
-    # filter only dejure variant
-    variant = filter_variants(el, dejure_list, retain=True)
+    Args:
+        el (EventLog): The event log.
+        disaggregation_column (str): Disaggregation attribute column.
 
-    return variant
+    Returns:
+        (np.ndarray): The group of every dejure case or -1 for all other cases and cases without value.
+        (list): The value of every group.
+    """
+    case_groups, groups = get_case_groups(el, disaggregation_column)
+    return np.where(el.cases['dejure_prefix_length'].to_numpy() > 0, case_groups, -1), groups
+
+
+def _get_activity_frequencies(el: EventLog, case_groups: np.ndarray) -> tuple[np.ndarray, list[Node]]:
+    """
+    Calculate the frequency of each activity, disregarding the cases without disaggregation value.
 
+    Args:
+        el (EventLog): The event log.
+        case_groups (np.ndarray): The group of every case, see
+            [get_case_groups][backend.src.process_mining.dejure.get_case_groups].
 
-def get_dejure_remain_graph(el: pd.DataFrame, disaggregation_column: str) -> Graph:
+    Returns:
+        (np.ndarray): The frequency of every activity code.
+        (list[Node]): The nodes of the activities that occur, ordered by descending frequency.
+    """
+    traces = el.traces
+    activities = traces.activities
+
+    event_groups = case_groups[traces.case_index]
+    act_freq = np.bincount(traces.activity_codes[event_groups >= 0], minlength=len(activities))
+    nodes = [Node(id=activities[code], label=activities[code], value=int(act_freq[code]))
+             for code in np.argsort(-act_freq, kind='stable') if act_freq[code] > 0]
+
+    return act_freq, nodes
+
+
+def get_dejure_remain_graph(el: EventLog, disaggregation_column: str) -> Graph:
     """
         Generates a graph representing the dejure DFG with activity frequencies
         and the percentage of each activity that goes to the next activity
         considering a specified disaggregation column.
 
         Args:
-            el (pd.DataFrame): The event log.
+            el (EventLog): The event log.
             disaggregation_column (str): Disaggregation attribute column
 
         Returns:
             Graph: A Graph object representing the dejure DFG
             with activity frequencies and percentage.
         """
+    traces = el.traces
+    activities = traces.activities
 
-    # Drop the disaggregation_column of nan and calculate the frequency of each activity
-    act_freq = el.dropna(subset=[disaggregation_column])['concept:name'].value_counts()
-    nodes = [Node(id=value, label=value, value=count) for value, count in act_freq.items()]
-
-    variant = get_dejure_variant(el)
+    # Calculate the frequency of each activity, disregarding the cases without disaggregation value
+    case_groups, groups = get_case_groups(el, disaggregation_column)
+    act_freq, nodes = _get_activity_frequencies(el, case_groups)
 
-    # Group the dejure cases by disaggregation_column, disregarding the disaggregation_column of nan
-    grouped_dfg = variant.groupby(disaggregation_column, observed=False).apply(lambda x: discover_dfg(x)[0])
-
-    all_edges = []
+    # Count the relations of the dejure cases of all values of the disaggregation column at once
+    dejure_case_groups, _ = get_dejure_case_groups(el, disaggregation_column)
+    grouped_dfg = discover_grouped_dfg(traces, dejure_case_groups, len(groups))
 
     # Calculate the percentage of one activity that goes to the next activity
-    for index, relation in grouped_dfg.items():
-        edges = [Edge(source=source, target=target, label=index, value=freq / act_freq[source])
-                 for (source, target), freq in relation.items()]
-        all_edges.extend(edges)
+    all_edges = [Edge(source=activities[source], target=activities[target], label=groups[group],
+                      value=grouped_dfg[group, source, target] / act_freq[source])
+                 for group, source, target in zip(*np.nonzero(grouped_dfg))]
 
     return Graph(
         name='Dejure-DFG',
@@ -65,45 +113,47 @@ def get_dejure_remain_graph(el: pd.DataFrame, disaggregation_column: str) -> Gra
     )
 
 
-def get_dejure_drop_graph(el: pd.DataFrame, disaggregation_column: str) -> Graph:
+def get_dejure_drop_graph(el: EventLog, disaggregation_column: str) -> Graph:
     """ Generates a graph representing the dejure DFG with counts of end activities
         and the dropout rate of each activity considering a specified disaggregation
         column.
 
         Args:
-            el (pd.DataFrame): The event log.
+            el (EventLog): The event log.
             disaggregation_column (str): Disaggregation attribute column
 
        Returns:
            Graph: A Graph object representing the dejure DFG
             with drop out information.
        """
+    traces = el.traces
+    activities = traces.activities
+
+    # Calculate the end activity counts considering disaggregation column, disregarding the cases without value
+    case_groups, groups = get_case_groups(el, disaggregation_column)
+    grouped = (case_groups >= 0) & (traces.case_lengths > 0)
+    end_codes = traces.activity_codes[traces.case_offsets[1:][grouped] - 1]
+    disaggregation_last_act = np.bincount(case_groups[grouped] * len(activities) + end_codes,
+                                          minlength=len(groups) * len(activities)) \
+        .reshape(len(groups), len(activities))
 
-    # Calculate the end activity counts considering disaggregation column
-    disaggregation_last_act = el.groupby(by=['case:concept:name']).last()[[disaggregation_column,
-                                                                           'concept:name']].value_counts()
     # Calculate the end activity counts
-    last_act_freq = disaggregation_last_act.groupby('concept:name').sum()
-    nodes = [Node(id=value, label=value, value=count) for value, count in last_act_freq.items()]
+    last_act_freq = disaggregation_last_act.sum(axis=0)
+    nodes = [Node(id=activities[code], label=activities[code], value=int(last_act_freq[code]))
+             for code in np.flatnonzero(last_act_freq)]
     nodes.append(Node(id='Referral', label='Referral', value=0))
 
-    variant = get_dejure_variant(el)
+    # Count the relations of the dejure cases of all values of the disaggregation column at once
+    dejure_case_groups, _ = get_dejure_case_groups(el, disaggregation_column)
+    grouped_dfg = discover_grouped_dfg(traces, dejure_case_groups, len(groups))
 
-    # Group the dejure cases by disaggregation_column, disregarding the disaggregation_column of nan
-    grouped_dfg = variant.groupby(disaggregation_column, observed=False).apply(lambda x: discover_dfg(x)[0])
-
-    all_edges = []
-
-    # Calculate the percentage of one activity that goes to the next activity
-    for index, relation in grouped_dfg.items():
-        edges = [
-            Edge(source=source, target=target, label=index,
-                value=(disaggregation_last_act.loc[index, source] / last_act_freq[source]) if last_act_freq.get(
-                    source, 0) != 0 else 0
-            )
-            for (source, target), freq in relation.items()
-        ]
-        all_edges.extend(edges)
+    # Calculate the percentage of the cases of each value that end with the source activity
+    all_edges = [
+        Edge(source=activities[source], target=activities[target], label=groups[group],
+             value=(disaggregation_last_act[group, source] / last_act_freq[source]) if last_act_freq[source] != 0
+             else 0)
+        for group, source, target in zip(*np.nonzero(grouped_dfg))
+    ]
 
     return Graph(
         name='Dejure-DFG',
@@ -112,13 +162,13 @@ def get_dejure_drop_graph(el: pd.DataFrame, disaggregation_column: str) -> Graph
     )
 
 
-def get_dejure_time_graph(el: pd.DataFrame, disaggregation_column: str, statistic: str) -> Graph:
+def get_dejure_time_graph(el: EventLog, disaggregation_column: str, statistic: str) -> Graph:
     """
         Generates a graph representing the dejure DFG with performance
         statistics considering a specified disaggregation attribute.
 
         Args:
-            el (pd.DataFrame): The event log.
+            el (EventLog): The event log.
             disaggregation_column (str): Disaggregation attribute column.
             statistic (str): The performance statistic to be considered.
 
@@ -126,21 +176,23 @@ def get_dejure_time_graph(el: pd.DataFrame, disaggregation_column: str, statisti
             Graph: A Graph object representing the dejure DFG
             with performance statistics.
         """
-
-    # Drop the disaggregation_column of nan and calculate the frequency of each activity
-    act_freq = el.dropna(subset=[disaggregation_column])['concept:name'].value_counts()
-    nodes = [Node(id=value, label=value, value=count) for value, count in act_freq.items()]
-
-    variant = get_dejure_variant(el)
-
-    # Group the dejure cases by disaggregation_column, disregarding the disaggregation_column of nan
-    grouped_dfg = variant.groupby(disaggregation_column, observed=False).apply(lambda x: discover_performance_dfg(x)[0])
-
-    all_edges = []
-    for index, relation in grouped_dfg.items():
-        edges = [Edge(source=source, target=target, label=index, value=performance[statistic] / 60)
-                 for (source, target), performance in relation.items()]
-        all_edges.extend(edges)
+    traces = el.traces
+    activities = traces.activities
+
+    # Calculate the frequency of each activity, disregarding the cases without disaggregation value
+    case_groups, groups = get_case_groups(el, disaggregation_column)
+    _, nodes = _get_activity_frequencies(el, case_groups)
+
+    # Calculate all statistics of the dejure cases of all values of the disaggregation column at once, such that
+    # requests of the other statistics reuse them
+    dejure_case_groups, _ = get_dejure_case_groups(el, disaggregation_column)
+    performance = el.get_result(
+        ('dejure_performance', disaggregation_column, tuple(groups)),
+        lambda: discover_grouped_performance_dfg(traces, dejure_case_groups, len(groups)))
+
+    all_edges = [Edge(source=activities[source], target=activities[target], label=groups[group], value=value / 60)
+                 for group, source, target, value in zip(performance['group'], performance['source'],
+                                                         performance['target'], performance[statistic])]
 
     return Graph(
         name='Dejure-DFG',
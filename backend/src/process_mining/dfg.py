@@ -1,22 +1,130 @@
+import numpy as np
 import pandas as pd
-from pm4py import discover_dfg
 
 from backend.src.dataclasses.charts import Graph, Edge, Node
+from backend.src.process_mining.event_log import EventLog
+from backend.src.process_mining.trace_store import TraceStore
 
 
-def get_dfg(el: pd.DataFrame) -> Graph:
+def discover_dfg(traces: TraceStore) -> tuple[dict[tuple[str, str], int], dict[str, int], dict[str, int]]:
+    """
+    Discover the directly-follows graph of the given traces, with the same result as pm4py's `discover_dfg`. Each pair
+    of directly following activities is encoded as a single integer, such that all pairs are counted at once.
+
+    Args:
+        traces (TraceStore): The traces of the event log.
+
+    Returns:
+        (dict[tuple[str, str], int]): The frequency of every directly-follows relation.
+        (dict[str, int]): The frequency of every start activity.
+        (dict[str, int]): The frequency of every end activity.
+    """
+    activities = traces.activities
+    codes = traces.activity_codes.astype(np.intp)
+    activity_count = len(activities)
+
+    sources, targets = traces.get_directly_follows()
+    frequencies = np.bincount(codes[sources] * activity_count + codes[targets], minlength=activity_count ** 2)
+    dfg = {(activities[pair // activity_count], activities[pair % activity_count]): int(frequencies[pair])
+           for pair in np.flatnonzero(frequencies)}
+
+    # like in pm4py, the start and end activities are the first and last events of a case in the order of the log
+    non_empty = traces.case_lengths > 0
+    start_frequencies = np.bincount(codes[traces.case_offsets[:-1][non_empty]], minlength=activity_count)
+    end_frequencies = np.bincount(codes[traces.case_offsets[1:][non_empty] - 1], minlength=activity_count)
+    start_activities = {activities[code]: int(start_frequencies[code]) for code in np.flatnonzero(start_frequencies)}
+    end_activities = {activities[code]: int(end_frequencies[code]) for code in np.flatnonzero(end_frequencies)}
+
+    return dfg, start_activities, end_activities
+
+
+def discover_grouped_dfg(traces: TraceStore, case_groups: np.ndarray, group_count: int) -> np.ndarray:
+    """
+    Discover the directly-follows graphs of all groups of cases at once, with the same frequencies as pm4py's
+    `discover_dfg` on the events of each group. Each triple of group, source activity and target activity is encoded as
+    a single integer, such that all triples are counted in one pass.
+
+    Args:
+        traces (TraceStore): The traces of the event log.
+        case_groups (np.ndarray): The group of every case between 0 and `group_count` or -1 for cases without group.
+        group_count (int): The number of groups.
+
+    Returns:
+        (np.ndarray): The frequencies of the directly-follows relations of all groups, indexed by group, source activity
+            code and target activity code.
+    """
+    codes = traces.activity_codes.astype(np.intp)
+    activity_count = len(traces.activities)
+
+    sources, targets = traces.get_directly_follows()
+    groups = case_groups[traces.case_index[sources]].astype(np.intp)
+    grouped = groups >= 0
+    triples = (groups[grouped] * activity_count + codes[sources[grouped]]) * activity_count + codes[targets[grouped]]
+
+    return np.bincount(triples, minlength=group_count * activity_count ** 2) \
+        .reshape(group_count, activity_count, activity_count)
+
+
+def discover_grouped_performance_dfg(traces: TraceStore, case_groups: np.ndarray, group_count: int) -> pd.DataFrame:
+    """
+    Discover the durations of the directly-follows relations of all groups of cases at once, with the same statistics as
+    pm4py's `discover_performance_dfg` on the events of each group. The durations between directly following events are
+    sorted by their triple of group, source activity and target activity, such that all statistics of all relations
+    are computed in one pass, e.g. to switch between the statistics without computing the durations again.
+
+    Args:
+        traces (TraceStore): The traces of the event log.
+        case_groups (np.ndarray): The group of every case between 0 and `group_count` or -1 for cases without group.
+        group_count (int): The number of groups.
+
+    Returns:
+        (pd.DataFrame): One row per group and directly-follows relation with the group, the source and target activity
+            codes and the `min`, `max`, `mean` and `median` durations in seconds.
+    """
+    codes = traces.activity_codes.astype(np.intp)
+    activity_count = len(traces.activities)
+
+    sources, targets = traces.get_directly_follows()
+    groups = case_groups[traces.case_index[sources]].astype(np.intp)
+    grouped = groups >= 0
+    sources, targets, groups = sources[grouped], targets[grouped], groups[grouped]
+
+    triples = (groups * activity_count + codes[sources]) * activity_count + codes[targets]
+    # like pandas' total_seconds
+    durations = (traces.timestamps[targets] - traces.timestamps[sources]) * 1e-9
+
+    # sort the durations of each triple, such that the statistics are taken from the bounds of the triples
+    order = np.lexsort((durations, triples))
+    triples, durations = triples[order], durations[order]
+    starts = np.flatnonzero(np.diff(triples, prepend=-1))
+    counts = np.diff(np.append(starts, len(triples)))
+
+    relations = triples[starts]
+    return pd.DataFrame({
+        'group': relations // activity_count ** 2,
+        'source': relations // activity_count % activity_count,
+        'target': relations % activity_count,
+        'min': durations[starts],
+        'max': durations[starts + counts - 1],
+        'mean': np.add.reduceat(durations, starts) / counts if len(starts) > 0 else durations[starts],
+        # the median of an even number of durations is the mean of the two middle durations
+        'median': (durations[starts + (counts - 1) // 2] + durations[starts + counts // 2]) / 2,
+    })
+
+
+def get_dfg(el: EventLog) -> Graph:
     """
     Generate a Process Mining DFG based on the given event log.
 
     Args:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
 
     Returns:
         (Graph): The DFG of the event log with absolute frequencies as edge values.
     """
 
     # find the directly-following graph
-    dfg, start_activities, end_activities = discover_dfg(el)
+    dfg, start_activities, end_activities = discover_dfg(el.traces)
 
     # transform into graph data structure
     edges = [Edge(source=source, target=target, label=None, value=freq) for (source, target), freq in dfg.items()]
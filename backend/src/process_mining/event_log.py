@@ -1,41 +1,286 @@
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Callable
+
 import numpy as np
 import pandas as pd
 
+from backend.src.data.columnar import is_columnar_fresh, read_columnar, write_columnar
 from backend.src.dataclasses.attributes import AttributeType, CategoricalAttribute, NumericalAttribute, \
     DisaggregationAttribute, PatientAttribute
-from backend.src.dataclasses.filters import FilterOperator, BaseFilter
-from definitions import PATIENT_ATTRIBUTES, FILTER_ATTRIBUTES
+from backend.src.dataclasses.filters import BaseFilter
+from backend.src.process_mining.filter_index import FilterIndex
+from backend.src.process_mining.trace_store import TraceStore, create_trace_store
+from definitions import PATIENT_ATTRIBUTES, FILTER_ATTRIBUTES, DE_JURE_VARIANT
+
+# marks results that are not computed yet, as None is a valid result
+_MISSING = object()
 
 
-def load_event_log(path: str) -> pd.DataFrame:
+@dataclass
+class EventLog:
+    """
+    An event log that is split into a case table and an event table, such that the attributes of a case are only
+    stored once instead of once per event. The event-level data frame that is expected by pm4py can be created with
+    [to_frame][backend.src.process_mining.event_log.EventLog.to_frame], which only joins the requested case columns.
+
+    Attributes:
+        cases (pd.DataFrame): The case table with one row per case. It contains the case id, the patient attributes, the
+            filter attributes, the length of the de jure prefix (`dejure_prefix_length`) and the
+            [activity matrix][backend.src.process_mining.event_log.get_activity_matrix].
+        events (pd.DataFrame): The event table with one row per event. It contains the position of the case in the
+            case table (`case:index`), the activity and the timestamp. The events are ordered by case. The events are
+            also available as integer arrays in the [trace store][backend.src.process_mining.event_log.EventLog.traces].
+    """
+    cases: pd.DataFrame
+    events: pd.DataFrame
+    _filter_index: FilterIndex | None = field(default=None, init=False, repr=False, compare=False)
+    _traces: TraceStore | None = field(default=None, init=False, repr=False, compare=False)
+    # the event log with the same event table, whose trace store is shared, see with_cases
+    _source: 'EventLog | None' = field(default=None, init=False, repr=False, compare=False)
+    _bin_codes: dict[tuple[str, tuple], np.ndarray] = field(default_factory=dict, init=False, repr=False,
+                                                            compare=False)
+    _results: dict[tuple, object] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def filter_index(self) -> FilterIndex:
+        """
+        Returns the filter index of the case table, which is built on first access.
+
+        Returns:
+            (FilterIndex): The filter index.
+        """
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self.cases)
+        return self._filter_index
+
+    @property
+    def traces(self) -> TraceStore:
+        """
+        Returns the [trace store][backend.src.process_mining.trace_store.TraceStore] of the event table, which is
+        built on first access.
+
+        Returns:
+            (TraceStore): The trace store.
+        """
+        if self._traces is None:
+            if self._source is not None:
+                self._traces = self._source.traces
+            else:
+                self._traces = create_trace_store(self.events, len(self.cases))
+        return self._traces
+
+    def get_bin_codes(self, name: str, bins: list[float]) -> np.ndarray:
+        """
+        Returns the bin of every case for the given numerical attribute, like the codes of `pd.cut` with the default
+        right-closed bins, i.e. case values in `(bins[i], bins[i + 1]]` have the code `i` and values outside of the
+        bins or missing values have the code -1. The codes are computed once per attribute and bins.
+
+        Args:
+            name (str): The name of the numerical attribute.
+            bins (list[float]): The edges of the bins in ascending order.
+
+        Returns:
+            (np.ndarray): The bin codes with one entry per case. The array must not be modified.
+        """
+        key = (name, tuple(bins))
+        codes = self._bin_codes.get(key)
+        if codes is None:
+            edges = np.asarray(bins, dtype=np.float64)
+            # the index of the first edge that is not smaller than the value is the index of the bin's upper edge
+            codes = np.searchsorted(edges, self.cases[name].to_numpy(dtype=np.float64), side='left') - 1
+            # values below the first edge, above the last edge or missing values (sorted last) are not in any bin
+            codes[(codes < 0) | (codes >= len(edges) - 1)] = -1
+            codes = codes.astype(np.int8 if len(edges) <= 128 else np.int32)
+            codes.flags.writeable = False
+            self._bin_codes[key] = codes
+        return codes
+
+    def get_result(self, key: tuple, compute: Callable[[], object]) -> object:
+        """
+        Returns the result of the given computation, which is computed once per key. The results are shared with the
+        views of the event log that are created by
+        [with_cases][backend.src.process_mining.event_log.EventLog.with_cases], so the key must identify the result for
+        all of them, e.g. by containing the bins of a binned attribute.
+
+        Args:
+            key (tuple): The key of the result.
+            compute (Callable[[], object]): The computation of the result.
+
+        Returns:
+            (object): The result, which must not be modified.
+        """
+        results = (self._source if self._source is not None else self)._results
+        result = results.get(key, _MISSING)
+        if result is _MISSING:
+            result = results[key] = compute()
+        return result
+
+    def get_memo_size(self) -> int:
+        """
+        Returns the approximate size in bytes of the data that is computed from the event log and kept with it, i.e.
+        the trace store, the bin codes and the results of
+        [get_result][backend.src.process_mining.event_log.EventLog.get_result]. The trace store and the results of a
+        view created by [with_cases][backend.src.process_mining.event_log.EventLog.with_cases] are counted for the
+        event log it was created from.
+
+        Returns:
+            (int): The size in bytes.
+        """
+        size = 0
+        # the memos are copied first, as other threads might add to them
+        for value in tuple(self._bin_codes.values()):
+            size += value.nbytes
+        if self._source is not None:
+            return size
+
+        if self._traces is not None:
+            traces = self._traces
+            size += traces.activity_codes.nbytes + traces.timestamps.nbytes + traces.case_offsets.nbytes
+            if 'case_index' in traces.__dict__:
+                size += traces.case_index.nbytes
+        for value in tuple(self._results.values()):
+            if isinstance(value, (pd.DataFrame, pd.Series)):
+                size += int(np.sum(value.memory_usage(index=True, deep=True)))
+            elif isinstance(value, np.ndarray):
+                size += value.nbytes
+            else:
+                size += sys.getsizeof(value)
+        return size
+
+    def __len__(self) -> int:
+        """
+        Returns the number of events in the event log.
+
+        Returns:
+            (int): The number of events.
+        """
+        return len(self.events)
+
+    def select(self, mask: np.ndarray) -> 'EventLog':
+        """
+        Select the cases of the given mask and all of their events.
+
+        Args:
+            mask (np.ndarray): A boolean array with one entry per case.
+
+        Returns:
+            (EventLog): The event log with the selected cases.
+        """
+        case_index = self.events['case:index'].to_numpy()
+        event_mask = mask[case_index]
+
+        # map the positions of the selected cases to their new positions
+        new_case_index = np.cumsum(mask, dtype=np.int32) - 1
+
+        events = pd.DataFrame({
+            'case:index': new_case_index[case_index[event_mask]],
+            'concept:name': self.events['concept:name'].values[event_mask],
+            'time:timestamp': self.events['time:timestamp'].to_numpy()[event_mask],
+        })
+
+        return EventLog(cases=self.cases[mask], events=events)
+
+    def with_cases(self, cases: pd.DataFrame) -> 'EventLog':
+        """
+        Replace the case table of the event log, e.g. by a case table with binned attributes. The new case table must
+        contain the same cases in the same order, so the trace store is shared.
+
+        Args:
+            cases (pd.DataFrame): The new case table.
+
+        Returns:
+            (EventLog): The event log with the new case table.
+        """
+        el = EventLog(cases=cases, events=self.events)
+        el._source = self._source if self._source is not None else self
+        return el
+
+    def to_frame(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Create an event-level data frame with one row per event, which contains the case id, the activity, the
+        timestamp and the given columns of the case table.
+
+        Args:
+            columns (list[str], optional): The columns of the case table to join. Defaults to all columns.
+
+        Returns:
+            (pd.DataFrame): The event-level data frame.
+        """
+        if columns is None:
+            columns = [c for c in self.cases.columns if c != 'case:concept:name']
+
+        df = self.cases[['case:concept:name'] + columns] \
+            .iloc[self.events['case:index'].to_numpy()] \
+            .reset_index(drop=True)
+        df.insert(1, 'concept:name', self.events['concept:name'].to_numpy(dtype=object))
+        df.insert(2, 'time:timestamp', self.events['time:timestamp'].to_numpy())
+
+        return df
+
+
+def load_event_log(path: str, columnar_path: str | None = None) -> EventLog:
     """
     Load the event log from the given path. The time column will be converted to datetime and the categorical columns
-    will be converted to categorical.
+    will be converted to categorical. The event log is split into a case table and an event table.
+
+    If a columnar path is given and the columnar store at this path is up to date with the event log, the event log is
+    read from the store without any parsing. Otherwise, the event log is parsed and the store is (re)written.
 
     Args:
         path (str): The path to the event log.
+        columnar_path (str, optional): The path to the columnar store of the event log. Defaults to None.
 
     Returns:
-        (pd.DataFrame): The event log.
+        (EventLog): The event log.
     """
+    if columnar_path is not None:
+        cases_path, events_path = os.path.join(columnar_path, 'cases'), os.path.join(columnar_path, 'events')
+        if is_columnar_fresh(cases_path, path) and is_columnar_fresh(events_path, path):
+            el = EventLog(cases=read_columnar(cases_path), events=read_columnar(events_path))
+            # build the trace store once for the loaded event log instead of on the first request
+            el.traces
+            return el
+
     # Load the event log
-    df = pd.read_csv(path, sep=',')
+    el = create_event_log(pd.read_csv(path, sep=','))
+
+    if columnar_path is not None:
+        write_columnar_event_log(el, path, columnar_path)
+
+    el.traces
+    return el
+
 
+def create_event_log(df: pd.DataFrame) -> EventLog:
+    """
+    Create an event log from the given event-level data frame, as it is stored in the event log file. The time column
+    will be converted to datetime, the process attributes of all cases will be calculated and the categorical columns
+    will be converted to categorical.
+
+    Args:
+        df (pd.DataFrame): The event-level data frame.
+
+    Returns:
+        (EventLog): The event log.
+    """
     # Convert the time columns to datetime
     df['time:timestamp'] = pd.to_datetime(df['time:timestamp'], format='ISO8601')
 
-    # Convert the categorical columns to categorical
-    categorical_columns = [k for k, v in PATIENT_ATTRIBUTES.items() if v == AttributeType.CATEGORICAL]
-    df[categorical_columns] = df[categorical_columns].astype('category')
-
     # Calculate all filter attribute related columns
     process_attributes = df.groupby('case:concept:name').agg(
         start_activity=('concept:name', 'first'),
         end_activity=('concept:name', 'last'),
         case_size=('concept:name', 'count'),
-        variant=('concept:name', lambda x: ' '.join(x)),
-        case_duration=('time:timestamp', lambda x: (x.iloc[-1] - x.iloc[0]).seconds)
+        start_time=('time:timestamp', 'first'),
+        end_time=('time:timestamp', 'last'),
     )
+    process_attributes['variant'] = get_case_variants(df)
+    process_attributes['dejure_prefix_length'] = get_dejure_prefix_lengths(process_attributes['variant'])
+    process_attributes['case_duration'] = (process_attributes['end_time'] - process_attributes['start_time']) \
+        .dt.total_seconds()
+    process_attributes = process_attributes.drop(columns=['start_time', 'end_time'])
 
     # Convert the categorical columns to categorical
     categorical_columns = [k for k, v in FILTER_ATTRIBUTES.items() if v == AttributeType.CATEGORICAL]
@@ -45,19 +290,235 @@ def load_event_log(path: str) -> pd.DataFrame:
     numerical_columns = [k for k, v in FILTER_ATTRIBUTES.items() if v == AttributeType.NUMERICAL]
     process_attributes[numerical_columns] = process_attributes[numerical_columns].astype(np.float64)
 
-    # Merge the process attributes with the event log
-    df = df.merge(process_attributes, on='case:concept:name')
+    # The patient attributes are the same for all events of a case, so they are taken from the first event
+    cases = df.drop_duplicates('case:concept:name') \
+        .set_index('case:concept:name') \
+        .sort_index()[list(PATIENT_ATTRIBUTES.keys())] \
+        .join(process_attributes) \
+        .reset_index()
+
+    # Convert the categorical columns to categorical
+    categorical_columns = [k for k, v in PATIENT_ATTRIBUTES.items() if v == AttributeType.CATEGORICAL]
+    cases[categorical_columns] = cases[categorical_columns].astype('category')
+
+    # The events only keep the position of their case in the case table, ordered by case
+    case_index = df.groupby('case:concept:name').ngroup().to_numpy()
+    order = np.argsort(case_index, kind='stable')
+    events = pd.DataFrame({
+        'case:index': case_index[order].astype(np.int32),
+        'concept:name': df['concept:name'].astype('category').values[order],
+        'time:timestamp': df['time:timestamp'].to_numpy()[order],
+    })
+
+    # The timestamp and position of each activity are stored per case to compute durations between activities
+    cases = pd.concat([cases, get_activity_matrix(events, len(cases))], axis=1)
+
+    return EventLog(cases=cases, events=events)
+
+
+def _union_categorical(a: pd.Series, b: pd.Series) -> pd.Categorical:
+    """
+    Concatenate two categorical columns on the sorted union of their categories. The codes of both columns are
+    remapped onto the union, such that the values do not have to be compared again.
+
+    Args:
+        a (pd.Series): The first categorical column.
+        b (pd.Series): The second categorical column.
+
+    Returns:
+        (pd.Categorical): The concatenated column.
+    """
+    a_categories, b_categories = a.cat.categories, b.cat.categories
+    if len(a_categories) == 0 or len(b_categories) == 0:
+        # the union with an empty index would lose the dtype of the categories
+        categories = a_categories if len(b_categories) == 0 else b_categories
+    else:
+        categories = a_categories.union(b_categories)
+
+    # missing values (-1) take the last entry of the mapping and stay missing
+    a_mapping = np.append(categories.get_indexer(a_categories), -1)
+    b_mapping = np.append(categories.get_indexer(b_categories), -1)
+    codes = np.concatenate([a_mapping[a.cat.codes.to_numpy()], b_mapping[b.cat.codes.to_numpy()]])
+
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def append_event_log(el: EventLog, delta: EventLog) -> EventLog:
+    """
+    Append the cases of the delta event log to the event log without parsing the event log again. The result is the
+    same as loading the event log file with the events of both event logs: the cases are ordered by their case id,
+    the categories of the categorical columns are the union of both categories and the activity matrix contains the
+    activities of both event logs. The per-case columns, like the variant, are taken from both case tables as they are.
+
+    Args:
+        el (EventLog): The event log.
+        delta (EventLog): The event log with the new cases, see
+            [create_event_log][backend.src.process_mining.event_log.create_event_log].
+
+    Returns:
+        (EventLog): The event log with the cases of both event logs.
+    """
+    case_ids = np.concatenate([el.cases['case:concept:name'].to_numpy(dtype=object),
+                               delta.cases['case:concept:name'].to_numpy(dtype=object)])
+    duplicated = np.intersect1d(el.cases['case:concept:name'].to_numpy(dtype=object),
+                                delta.cases['case:concept:name'].to_numpy(dtype=object))
+    if len(duplicated) > 0:
+        raise ValueError(f'The cases {", ".join(map(str, duplicated[:5]))} are already part of the event log.')
+
+    # the position of every case of both case tables in the merged case table
+    order = np.argsort(case_ids, kind='stable')
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+
+    # columns of activities that do not occur in one of the event logs are missing and filled below
+    categorical_columns = [name for name, column in el.cases.items() if isinstance(column.dtype, pd.CategoricalDtype)]
+    cases = pd.concat([el.cases.drop(columns=categorical_columns), delta.cases.drop(columns=categorical_columns)],
+                      ignore_index=True)
+    for name in categorical_columns:
+        cases[name] = _union_categorical(el.cases[name], delta.cases[name])
+    cases = cases[el.cases.columns.union(cases.columns, sort=False)].iloc[order].reset_index(drop=True)
+
+    activities = _union_categorical(el.events['concept:name'], delta.events['concept:name'])
+    case_index = np.concatenate([rank[el.events['case:index'].to_numpy()],
+                                 rank[len(el.cases) + delta.events['case:index'].to_numpy()]])
+    # each case only has events in one of the event logs, so the stable sort keeps the order of the events of a case
+    event_order = np.argsort(case_index, kind='stable')
+    events = pd.DataFrame({
+        'case:index': case_index[event_order],
+        'concept:name': activities[event_order],
+        'time:timestamp': np.concatenate([el.events['time:timestamp'].to_numpy(),
+                                          delta.events['time:timestamp'].to_numpy()])[event_order],
+    })
+
+    # order the activity matrix like the categories of the activities
+    matrix_columns = []
+    for activity in activities.categories:
+        cases[f'position:{activity}'] = cases[f'position:{activity}'].fillna(-1).astype(np.int16)
+        matrix_columns += [f'time:{activity}', f'position:{activity}']
+    columns = [c for c in cases.columns if not c.startswith(('time:', 'position:'))]
+
+    return EventLog(cases=cases[columns + matrix_columns], events=events)
+
+
+def write_columnar_event_log(el: EventLog, path: str, columnar_path: str):
+    """
+    Write the case table and the event table of the event log to the columnar store at the given path. The store is
+    marked as up to date with the event log file at the given path. Errors while writing are only reported, as the
+    event log can always be loaded from the event log file.
+
+    Args:
+        el (EventLog): The event log.
+        path (str): The path to the event log file.
+        columnar_path (str): The path to the columnar store of the event log.
+    """
+    try:
+        write_columnar(el.cases, os.path.join(columnar_path, 'cases'), source=path)
+        write_columnar(el.events, os.path.join(columnar_path, 'events'), source=path)
+    except OSError as e:
+        print(f'The columnar event log could not be written to {columnar_path}: {e}')
+
+
+def get_case_variants(el: pd.DataFrame) -> pd.Categorical:
+    """
+    Get the variant of each case in the event log, i.e. the activity names of the case joined by a space. The cases
+    are ordered by their case id.
+
+    The activities of each case are packed as integer codes into one row of a matrix, such that every distinct row is
+    a variant. Thus, the variant string is only built once per variant instead of once per case.
+
+    Args:
+        el (pd.DataFrame): The event log.
+
+    Returns:
+        (pd.Categorical): The variant of each case.
+    """
+    activities = el['concept:name'].astype('category')
+    grouped = el.groupby('case:concept:name')
+    case_index = grouped.ngroup().to_numpy()
+    position = grouped.cumcount().to_numpy()
+
+    # pack the activity codes of each case into one row, missing positions are marked by -1
+    traces = np.full((grouped.ngroups, position.max() + 1), -1, dtype=np.int16)
+    traces[case_index, position] = activities.cat.codes.to_numpy()
+    unique_traces, variant_codes = np.unique(traces, axis=0, return_inverse=True)
+
+    names = activities.cat.categories.to_numpy()
+    variants = np.array([' '.join(names[trace[trace >= 0]]) for trace in unique_traces], dtype=object)
+
+    # sort the variants by name, like the categories of a categorical column
+    order = np.argsort(variants)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    return pd.Categorical.from_codes(rank[variant_codes.reshape(-1)], categories=variants[order])
+
+
+def get_activity_matrix(events: pd.DataFrame, case_count: int) -> pd.DataFrame:
+    """
+    Get the wide activity matrix of the cases, which contains one timestamp column (`time:<activity>`) and one position
+    column (`position:<activity>`) per activity. The position is the index of the event within its case. If an
+    activity does not occur in a case, the timestamp is NaT and the position is -1. If it occurs multiple times, the
+    first occurrence is used, which is no restriction for the extracted event log, as it contains every activity at
+    most once per case.
+
+    Args:
+        events (pd.DataFrame): The event table, ordered by case.
+        case_count (int): The number of cases.
+
+    Returns:
+        (pd.DataFrame): The activity matrix with one row per case.
+    """
+    case_index = events['case:index'].to_numpy().astype(np.int64)
+    activities = events['concept:name'].cat
+    activity_codes = activities.codes.to_numpy().astype(np.int64)
+    timestamps = events['time:timestamp'].to_numpy()
+
+    # as the events are ordered by case, the position of an event is its distance to the first event of its case
+    positions = np.arange(len(case_index)) - np.searchsorted(case_index, case_index, 'left')
+
+    # only the first occurrence of every activity of a case is kept
+    _, first = np.unique(case_index * len(activities.categories) + activity_codes, return_index=True)
+
+    shape = (case_count, len(activities.categories))
+    time_matrix = np.full(shape, np.datetime64('NaT'), dtype=timestamps.dtype)
+    time_matrix[case_index[first], activity_codes[first]] = timestamps[first]
+    position_matrix = np.full(shape, -1, dtype=np.int16)
+    position_matrix[case_index[first], activity_codes[first]] = positions[first]
+
+    columns = {}
+    for i, activity in enumerate(activities.categories):
+        columns[f'time:{activity}'] = time_matrix[:, i]
+        columns[f'position:{activity}'] = position_matrix[:, i]
+
+    return pd.DataFrame(columns)
+
 
-    return df
+def get_dejure_prefix_lengths(variants: pd.Series) -> np.ndarray:
+    """
+    Get the length of the de jure prefix of each case, i.e. the number of activities if the variant of the case is a
+    prefix of the de jure variant and 0 otherwise. Thus, the cases following the de jure process up to some activity
+    can be selected with a single comparison. The length is only computed once per variant.
 
+    Args:
+        variants (pd.Series): The categorical variant of each case.
 
-def load_patient_attributes(event_log: pd.DataFrame) -> list[PatientAttribute]:
+    Returns:
+        (np.ndarray): The length of the de jure prefix of each case.
+    """
+    prefixes = {' '.join(DE_JURE_VARIANT[:i + 1]): i + 1 for i in range(len(DE_JURE_VARIANT))}
+    lengths = np.array([prefixes.get(variant, 0) for variant in variants.cat.categories] + [0], dtype=np.int8)
+
+    # missing variants (-1) take the last entry
+    return lengths[variants.cat.codes.to_numpy()]
+
+
+def load_patient_attributes(event_log: EventLog) -> list[PatientAttribute]:
     """
     Load the patient attributes from the event log. For categorical attributes, all possible values will be extracted.
     For numerical attributes, the minimum and maximum value will be extracted.
 
     Args:
-        event_log (pd.DataFrame): The event log.
+        event_log (EventLog): The event log.
 
     Returns:
         (list[PatientAttribute]): The patient attributes.
@@ -67,20 +528,20 @@ def load_patient_attributes(event_log: pd.DataFrame) -> list[PatientAttribute]:
     # Iterate over all patient attributes and add them to the corresponding list
     for name, attribute_type in PATIENT_ATTRIBUTES.items():
         if attribute_type == AttributeType.CATEGORICAL:
-            attributes.append(CategoricalAttribute(name, event_log[name].cat.categories))
+            attributes.append(CategoricalAttribute(name, event_log.cases[name].cat.categories))
         elif attribute_type == AttributeType.NUMERICAL:
-            attributes.append(NumericalAttribute(name, event_log[name].min(), event_log[name].max()))
+            attributes.append(NumericalAttribute(name, event_log.cases[name].min(), event_log.cases[name].max()))
 
     return attributes
 
 
-def load_filter_attributes(event_log: pd.DataFrame) -> list[PatientAttribute]:
+def load_filter_attributes(event_log: EventLog) -> list[PatientAttribute]:
     """
     Load the filter attributes from the event log. For categorical attributes, all possible values will be extracted.
     For numerical attributes, the minimum and maximum value will be extracted.
 
     Args:
-        event_log (pd.DataFrame): The event log.
+        event_log (EventLog): The event log.
 
     Returns:
         (list[PatientAttribute]): The filter attributes.
@@ -90,78 +551,53 @@ def load_filter_attributes(event_log: pd.DataFrame) -> list[PatientAttribute]:
     # Iterate over all filter attributes and add them to the corresponding list
     for name, attribute_type in FILTER_ATTRIBUTES.items():
         if attribute_type == AttributeType.CATEGORICAL:
-            attributes.append(CategoricalAttribute(name, event_log[name].cat.categories))
+            attributes.append(CategoricalAttribute(name, event_log.cases[name].cat.categories))
         elif attribute_type == AttributeType.NUMERICAL:
-            attributes.append(NumericalAttribute(name, event_log[name].min(), event_log[name].max()))
+            attributes.append(NumericalAttribute(name, event_log.cases[name].min(), event_log.cases[name].max()))
 
     return attributes
 
 
-def create_bins(el: pd.DataFrame, disaggregation_attribute: DisaggregationAttribute | None = None) \
-        -> tuple[pd.DataFrame, str | None]:
+def create_bins(el: EventLog, disaggregation_attribute: DisaggregationAttribute | None = None) \
+        -> tuple[EventLog, str | None]:
     """
-    Create bins for the given data frame. The bins will be created based on the given disaggregation attribute.
-    If no disaggregation attribute or a categorical disaggregation attribute is given, the data frame will not be
-    modified. If a numerical disaggregation attribute is given, the data frame will be binned based on the bins of the
+    Create bins for the given event log. The bins will be created based on the given disaggregation attribute.
+    If no disaggregation attribute or a categorical disaggregation attribute is given, the event log will not be
+    modified. If a numerical disaggregation attribute is given, the case table will be binned based on the bins of the
     disaggregation attribute. The bins will be represented by the bin labels of the disaggregation attribute.
 
     Args:
-        el (pd.DataFrame): The data frame.
+        el (EventLog): The event log.
         disaggregation_attribute (DisaggregationAttribute, optional): The disaggregation attribute. Defaults to None.
 
     Returns:
-        (pd.DataFrame): The data frame.
+        (EventLog): The event log.
         (str): The name of the column containing the disaggregation attribute.
     """
-    # copy the column of the disaggregation attribute to a temporary column to avoid modifying the original data frame
-    if disaggregation_attribute is not None:
-        # copy the dataframe to avoid modifying the original data frame
-        el = el.copy()
+    if disaggregation_attribute is not None and disaggregation_attribute.type == AttributeType.NUMERICAL:
+        name = disaggregation_attribute.name
+        codes = el.get_bin_codes(name, disaggregation_attribute.get_bins())
+        binned = pd.Categorical.from_codes(codes, categories=disaggregation_attribute.get_bin_labels(), ordered=True)
 
-        if disaggregation_attribute.type == AttributeType.NUMERICAL:
-            # bin the numerical values
-            el[disaggregation_attribute.name] = pd.cut(el[disaggregation_attribute.name],
-                                                       bins=disaggregation_attribute.get_bins(),
-                                                       labels=disaggregation_attribute.get_bin_labels())
+        # the other columns of the case table are shared with the original event log instead of being copied
+        cases = pd.DataFrame({column: binned if column == name else el.cases[column] for column in el.cases.columns},
+                             index=el.cases.index, copy=False)
+        el = el.with_cases(cases)
 
     return el, disaggregation_attribute.name if disaggregation_attribute is not None else None
 
 
-def filter_log(el: pd.DataFrame, filters: list[BaseFilter]) -> pd.DataFrame:
+def filter_log(el: EventLog, filters: list[BaseFilter]) -> EventLog:
     """
-    Filter the event log based on the given filters. The filters will be applied in the order they are given.
-    As all filters are applied to the same data frame, one can think of the filters combined with a logical AND.
+    Filter the event log based on the given filters. The filters are resolved with the
+    [filter index][backend.src.process_mining.filter_index.FilterIndex] of the event log into a single mask of cases,
+    so one can think of the filters combined with a logical AND. The event log is only materialized once at the end.
 
     Args:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
         filters (list[BaseFilter]): The filters.
 
     Returns:
-        (pd.DataFrame): The filtered event log.
-    """
-    for filter in filters:
-        match filter.operator:
-            case FilterOperator.IS_EMPTY:
-                el = el[el[filter.attribute_name].isna()]
-            case FilterOperator.IS_NOT_EMPTY:
-                el = el[el[filter.attribute_name].notna()]
-            case FilterOperator.EQUALS:
-                el = el[el[filter.attribute_name] == filter.filter_value]
-            case FilterOperator.NOT_EQUALS:
-                el = el[el[filter.attribute_name] != filter.filter_value]
-            case FilterOperator.CONTAINS:
-                el = el[el[filter.attribute_name].isin(filter.filter_value)]
-            case FilterOperator.NOT_CONTAINS:
-                el = el[~el[filter.attribute_name].isin(filter.filter_value)]
-            case FilterOperator.LESS_THAN:
-                el = el[el[filter.attribute_name] < filter.filter_value]
-            case FilterOperator.LESS_THAN_OR_EQUALS:
-                el = el[el[filter.attribute_name] <= filter.filter_value]
-            case FilterOperator.GREATER_THAN:
-                el = el[el[filter.attribute_name] > filter.filter_value]
-            case FilterOperator.GREATER_THAN_OR_EQUALS:
-                el = el[el[filter.attribute_name] >= filter.filter_value]
-            case _:
-                raise ValueError('The operator is not supported.')
-
-    return el
+        (EventLog): The filtered event log.
+    """
+    return el.select(el.filter_index.resolve(filters))
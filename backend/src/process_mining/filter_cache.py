@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+
+from backend.src.dataclasses.filters import BaseFilter
+from backend.src.process_mining.event_log import EventLog, filter_log
+
+FilterKey = tuple[tuple[str, str, object], ...]
+
+
+def get_filter_key(filters: list[BaseFilter]) -> FilterKey:
+    """
+    Get a canonical key of the given filters. As the filters are combined with a logical AND, the order of the filters
+    and duplicated filters do not change the result and are therefore not part of the key. The same holds for the
+    order of the values of filters that accept multiple values.
+
+    Args:
+        filters (list[BaseFilter]): The filters.
+
+    Returns:
+        (FilterKey): The canonical key of the filters.
+    """
+    items = set()
+    for f in filters:
+        value = f.filter_value
+        if isinstance(value, list):
+            # the type is kept in the sort key, as e.g. 2018 and '2018' are different values
+            value = tuple(sorted(set(value), key=repr))
+        items.add((f.attribute_name, f.operator.value, value))
+
+    return tuple(sorted(items, key=repr))
+
+
+def get_size(el: EventLog) -> int:
+    """
+    Get the approximate size of the given event log in bytes, including the data that was computed from it, see
+    [get_memo_size][backend.src.process_mining.event_log.EventLog.get_memo_size]. The values of object columns are
+    not counted, as they are shared with the event log the event log was filtered from.
+
+    Args:
+        el (EventLog): The event log.
+
+    Returns:
+        (int): The size in bytes.
+    """
+    return int(el.cases.memory_usage(index=True).sum() + el.events.memory_usage(index=True).sum()) + el.get_memo_size()
+
+
+class FilterCache:
+    """
+    A least recently used cache of filtered event logs, such that requests with the same filters share the filtering
+    of the event log. The filters are identified by their canonical key, see
+    [get_filter_key][backend.src.process_mining.filter_cache.get_filter_key]. The cache is bounded by the number of
+    entries and by the size of the cached event logs, and it is cleared if it is used with a different event log.
+    As the results that are computed from a cached event log are kept with it, the size of an entry grows after it was
+    added, so it is estimated again whenever the entry is used.
+    If cases are appended to the event log, only the entries whose filters match one of the new cases are removed, see
+    [append][backend.src.process_mining.filter_cache.FilterCache.append].
+
+    Attributes:
+        max_entries (int): The maximum number of cached event logs.
+        max_bytes (int): The maximum total size of the cached event logs in bytes.
+        hits (int): The number of requests that were answered from the cache.
+        misses (int): The number of requests that required filtering the event log.
+        evictions (int): The number of event logs that were removed to stay within the bounds.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+        self._event_log: EventLog | None = None
+        self._entries: OrderedDict[FilterKey, tuple[EventLog, int, list[BaseFilter]]] = OrderedDict()
+        self._bytes: int = 0
+        self._lock = threading.Lock()
+
+    def get(self, el: EventLog, filters: list[BaseFilter]) -> EventLog:
+        """
+        Get the event log filtered by the given filters. The cached event logs must not be modified.
+
+        Args:
+            el (EventLog): The event log.
+            filters (list[BaseFilter]): The filters.
+
+        Returns:
+            (EventLog): The filtered event log.
+        """
+        key = get_filter_key(filters)
+
+        with self._lock:
+            if el is not self._event_log:
+                self._clear()
+                self._event_log = el
+
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                cached, size, _ = self._entries[key]
+                # count the results that were computed from the event log since it was used last
+                self._entries[key] = (cached, get_size(cached), filters)
+                self._bytes += self._entries[key][1] - size
+                self._evict()
+                return cached
+
+            self.misses += 1
+
+        filtered = filter_log(el, filters)
+        size = get_size(filtered)
+
+        with self._lock:
+            # the event log might have been replaced or the filters added by another thread in the meantime
+            if el is self._event_log and key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (filtered, size, filters)
+                self._bytes += size
+                self._evict()
+
+        return filtered
+
+    def _evict(self):
+        # the least recently used event logs are removed until the cache is within its bounds
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def append(self, el: EventLog, delta: EventLog, clear: bool = False):
+        """
+        Use the cache with the event log that the cases of the delta event log were appended to. The cached event logs
+        whose filters do not match any of the new cases stay valid, all other entries are removed.
+
+        Args:
+            el (EventLog): The event log with the appended cases.
+            delta (EventLog): The event log with the new cases.
+            clear (bool, optional): Whether all entries are removed, e.g. because the categories of a column changed.
+                Defaults to False.
+        """
+        with self._lock:
+            if clear:
+                self._clear()
+            else:
+                for key, (_, size, filters) in list(self._entries.items()):
+                    if delta.filter_index.resolve(filters).any():
+                        del self._entries[key]
+                        self._bytes -= size
+
+            self._event_log = el
+
+    def clear(self):
+        """
+        Remove all cached event logs.
+        """
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            (dict[str, int]): The hits, misses, evictions, number of entries and size in bytes of the cache.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
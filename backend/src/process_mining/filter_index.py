@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from backend.src.dataclasses.filters import BaseFilter, FilterOperator
+
+
+def get_filter_mask(column: pd.Series, filter: BaseFilter) -> np.ndarray:
+    """
+    Evaluate the given filter on a column of the case table without an index.
+
+    Args:
+        column (pd.Series): The column of the attribute of the filter.
+        filter (BaseFilter): The filter.
+
+    Returns:
+        (np.ndarray): A boolean array with one entry per case, which is True for all cases matching the filter.
+    """
+    match filter.operator:
+        case FilterOperator.IS_EMPTY:
+            mask = column.isna()
+        case FilterOperator.IS_NOT_EMPTY:
+            mask = column.notna()
+        case FilterOperator.EQUALS:
+            mask = column == filter.filter_value
+        case FilterOperator.NOT_EQUALS:
+            mask = column != filter.filter_value
+        case FilterOperator.CONTAINS:
+            mask = column.isin(filter.filter_value)
+        case FilterOperator.NOT_CONTAINS:
+            mask = ~column.isin(filter.filter_value)
+        case FilterOperator.LESS_THAN:
+            mask = column < filter.filter_value
+        case FilterOperator.LESS_THAN_OR_EQUALS:
+            mask = column <= filter.filter_value
+        case FilterOperator.GREATER_THAN:
+            mask = column > filter.filter_value
+        case FilterOperator.GREATER_THAN_OR_EQUALS:
+            mask = column >= filter.filter_value
+        case _:
+            raise ValueError('The operator is not supported.')
+
+    return mask.to_numpy(dtype=bool)
+
+
+class _CategoricalIndex:
+    """
+    A bitmap index of a categorical column. There is one bitmap per category and one bitmap for the missing values.
+
+    Attributes:
+        categories (pd.Index): The categories of the column.
+        bitmaps (np.ndarray): The packed bitmaps, one row per category and a last row for the missing values.
+    """
+
+    def __init__(self, column: pd.Series):
+        self.categories: pd.Index = column.cat.categories
+
+        # set the bit of each case in the row of its category, missing values (-1) end up in the last row
+        codes = column.cat.codes.to_numpy().astype(np.intp)
+        codes[codes < 0] = len(self.categories)
+        positions = np.arange(len(codes))
+
+        self.bitmaps: np.ndarray = np.zeros((len(self.categories) + 1, (len(codes) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(self.bitmaps, (codes, positions >> 3), (0x80 >> (positions & 7)).astype(np.uint8))
+
+    def _values(self, values: list) -> np.ndarray:
+        """
+        Get the union of the bitmaps of the given values. Values that are not a category match no case.
+
+        Args:
+            values (list): The values.
+
+        Returns:
+            (np.ndarray): The packed bitmap.
+        """
+        rows = self.categories.get_indexer(pd.Index(values, dtype=object))
+        return np.bitwise_or.reduce(self.bitmaps[rows[rows >= 0]], axis=0, initial=0).astype(np.uint8)
+
+    def bitmap(self, filter: BaseFilter) -> np.ndarray | None:
+        """
+        Get the packed bitmap of the cases matching the given filter.
+
+        Args:
+            filter (BaseFilter): The filter.
+
+        Returns:
+            (np.ndarray | None): The packed bitmap or None if the operator is not supported by the index.
+        """
+        match filter.operator:
+            case FilterOperator.IS_EMPTY:
+                return self.bitmaps[-1]
+            case FilterOperator.IS_NOT_EMPTY:
+                return ~self.bitmaps[-1]
+            case FilterOperator.EQUALS:
+                return self._values([filter.filter_value])
+            case FilterOperator.NOT_EQUALS:
+                # like pandas, missing values are not equal to any value
+                return ~self._values([filter.filter_value])
+            case FilterOperator.CONTAINS:
+                return self._values(filter.filter_value)
+            case FilterOperator.NOT_CONTAINS:
+                return ~self._values(filter.filter_value)
+            case _:
+                return None
+
+
+class _NumericalIndex:
+    """
+    A sorted index of a numerical column. Range filters are resolved with a binary search on the sorted values.
+
+    Attributes:
+        size (int): The number of cases.
+        order (np.ndarray): The positions of the cases with a value, sorted by their value.
+        values (np.ndarray): The sorted values.
+        missing (np.ndarray): The packed bitmap of the cases without a value.
+    """
+
+    def __init__(self, column: pd.Series):
+        values = column.to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+
+        self.size: int = len(values)
+        self.order: np.ndarray = np.flatnonzero(~missing)[np.argsort(values[~missing], kind='stable')]
+        self.values: np.ndarray = values[self.order]
+        self.missing: np.ndarray = np.packbits(missing)
+
+    def _range(self, start: int, end: int) -> np.ndarray:
+        """
+        Get the packed bitmap of the cases between the given positions of the sorted values.
+
+        Args:
+            start (int): The first position.
+            end (int): The position after the last position.
+
+        Returns:
+            (np.ndarray): The packed bitmap.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.order[start:end]] = True
+        return np.packbits(mask)
+
+    def bitmap(self, filter: BaseFilter) -> np.ndarray | None:
+        """
+        Get the packed bitmap of the cases matching the given filter.
+
+        Args:
+            filter (BaseFilter): The filter.
+
+        Returns:
+            (np.ndarray | None): The packed bitmap or None if the operator is not supported by the index.
+        """
+        value = filter.filter_value
+        match filter.operator:
+            case FilterOperator.IS_EMPTY:
+                return self.missing
+            case FilterOperator.IS_NOT_EMPTY:
+                return ~self.missing
+            case FilterOperator.EQUALS:
+                return self._range(np.searchsorted(self.values, value, 'left'),
+                                   np.searchsorted(self.values, value, 'right'))
+            case FilterOperator.NOT_EQUALS:
+                # like pandas, missing values are not equal to any value
+                return ~self._range(np.searchsorted(self.values, value, 'left'),
+                                    np.searchsorted(self.values, value, 'right'))
+            case FilterOperator.LESS_THAN:
+                return self._range(0, np.searchsorted(self.values, value, 'left'))
+            case FilterOperator.LESS_THAN_OR_EQUALS:
+                return self._range(0, np.searchsorted(self.values, value, 'right'))
+            case FilterOperator.GREATER_THAN:
+                return self._range(np.searchsorted(self.values, value, 'right'), len(self.values))
+            case FilterOperator.GREATER_THAN_OR_EQUALS:
+                return self._range(np.searchsorted(self.values, value, 'left'), len(self.values))
+            case _:
+                return None
+
+
+class FilterIndex:
+    """
+    An index of the case table that resolves a list of filters into a single mask of cases. Categorical columns are
+    indexed with one bitmap per category and numerical columns are indexed by their sorted values. The bitmaps of all
+    filters are combined with a logical AND, such that no intermediate data frames are created.
+
+    Attributes:
+        cases (pd.DataFrame): The indexed case table.
+    """
+
+    def __init__(self, cases: pd.DataFrame):
+        self.cases: pd.DataFrame = cases
+        self._indexes: dict[str, _CategoricalIndex | _NumericalIndex] = {}
+
+        for name, column in cases.items():
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                self._indexes[name] = _CategoricalIndex(column)
+            elif pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+                self._indexes[name] = _NumericalIndex(column)
+
+    def bitmap(self, filter: BaseFilter) -> np.ndarray:
+        """
+        Get the packed bitmap of the cases matching the given filter. If the attribute of the filter is not indexed or
+        the operator is not supported by the index, the filter is evaluated on the column.
+
+        Args:
+            filter (BaseFilter): The filter.
+
+        Returns:
+            (np.ndarray): The packed bitmap.
+        """
+        index = self._indexes.get(filter.attribute_name)
+        bitmap = index.bitmap(filter) if index is not None else None
+
+        if bitmap is None:
+            bitmap = np.packbits(get_filter_mask(self.cases[filter.attribute_name], filter))
+
+        return bitmap
+
+    def resolve(self, filters: list[BaseFilter]) -> np.ndarray:
+        """
+        Resolve the given filters into a mask of cases. The filters are combined with a logical AND.
+
+        Args:
+            filters (list[BaseFilter]): The filters.
+
+        Returns:
+            (np.ndarray): A boolean array with one entry per case, which is True for all cases matching all filters.
+        """
+        bitmap = np.full((len(self.cases) + 7) // 8, 0xFF, dtype=np.uint8)
+        for filter in filters:
+            bitmap &= self.bitmap(filter)
+
+        return np.unpackbits(bitmap, count=len(self.cases)).astype(bool)
@@ -1,19 +1,18 @@
+import numpy as np
 import pandas as pd
-from pm4py.filtering import filter_variants, filter_between
-from pm4py.stats import get_all_case_durations
 
 from backend.src.dataclasses.charts import MultiDataSeries
+from backend.src.process_mining.event_log import EventLog
+from definitions import DE_JURE_VARIANT
 
-DE_JURE_VARIANT = ('Referral', 'Evaluation', 'Approach', 'Authorization', 'Procurement', 'Transplant')
 
-
-def get_happy_path_adherence(el: pd.DataFrame, disaggregation_column: str,
+def get_happy_path_adherence(el: EventLog, disaggregation_column: str,
                              legend_column: str | None) -> MultiDataSeries:
     """
     Calculate happy path adherence proportions for different attributes in the event log.
 
     Args:
-        el (pd.DataFrame): The event log DataFrame.
+        el (EventLog): The event log.
         disaggregation_column (str): The column used for disaggregation.
         legend_column (str | None): The column used for legend.
 
@@ -22,47 +21,43 @@ def get_happy_path_adherence(el: pd.DataFrame, disaggregation_column: str,
     """
     group = [disaggregation_column] if legend_column is None else [legend_column, disaggregation_column]
 
-    # count the number of cases for each group
-    legend_case = el.groupby(group) \
-        .apply(lambda x: x['case:concept:name'].nunique()) \
-        .fillna(0)
-
-    # filter only happy path
-    variant = filter_variants(el, [DE_JURE_VARIANT], retain=True)
+    # count the cases and happy paths for each group, all categories are kept if there is no legend
+    counts = _count_happy_paths(el, group, observed=legend_column is not None)
 
-    # count the number of happy paths for each group and divide by the number of cases in each group
-    legend_happy_proportion = variant.groupby(group) \
-                                  .apply(lambda x: x['case:concept:name'].nunique()) / legend_case
-    legend_happy_proportion = legend_happy_proportion.fillna(0)
+    # divide the number of happy paths by the number of cases in each group
+    legend_happy_proportion = (counts['happy_paths'] / counts['cases']).fillna(0)
 
     return MultiDataSeries.from_pandas(legend_happy_proportion, 'Happy path adherence')
 
 
-def get_dropout(el: pd.DataFrame, disaggregation_column: str) -> MultiDataSeries:
+def get_dropout(el: EventLog, disaggregation_column: str) -> MultiDataSeries:
     """
     Calculate dropout information based on a specified disaggregation attribute in the event log.
 
     Args:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
         disaggregation_column (str): The column used for disaggregation.
 
     Returns:
         The dropout information based on a specified disaggregation attribute in the event log.
     """
     # We start by selecting the last activity and the corresponding disaggregation attribute for each case
-    last_activities = el.groupby(by=['case:concept:name']).last()[[disaggregation_column, 'concept:name']]
+    last_activities = pd.DataFrame({
+        disaggregation_column: el.cases[disaggregation_column],
+        'concept:name': el.cases['end_activity'].astype(object),
+    })
     # We then count the number of cases for each last activity and disaggregation attribute
     last_activities_count = last_activities.value_counts()
 
     return MultiDataSeries.from_pandas(last_activities_count, 'Dropout rate')
 
 
-def get_permuted_path(el: pd.DataFrame, disaggregation_column: str, legend_column: str | None) -> MultiDataSeries:
+def get_permuted_path(el: EventLog, disaggregation_column: str, legend_column: str | None) -> MultiDataSeries:
     """
     Calculate permuted path information based on specified disaggregation attributes in the event log.
 
     Args:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
         disaggregation_column (str): The column used for disaggregation.
         legend_column (str): The column used for legend.
 
@@ -71,23 +66,42 @@ def get_permuted_path(el: pd.DataFrame, disaggregation_column: str, legend_colum
     """
     group = [disaggregation_column] if legend_column is None else [legend_column, disaggregation_column]
 
-    # filter out happy path
-    permuted_paths = filter_variants(el, [DE_JURE_VARIANT], retain=False)
+    # count the cases that do not follow the happy path for each group, all categories are kept if there is no legend
+    counts = _count_happy_paths(el, group, observed=legend_column is not None)
+    permuted_paths_count = counts['cases'] - counts['happy_paths']
 
-    # count the number of cases for each group
-    permuted_paths_count = permuted_paths.groupby(by=group) \
-        .apply(lambda x: x['case:concept:name'].nunique()) \
-        .fillna(0)
+    # like for a groupby of the permuted paths, only observed groups are kept if there is a legend
+    if legend_column is not None:
+        permuted_paths_count = permuted_paths_count[permuted_paths_count > 0]
 
     return MultiDataSeries.from_pandas(permuted_paths_count, 'Permuted path adherence')
 
 
-def get_bureaucratic_duration(el: pd.DataFrame, disaggregation_column: str, legend_column: str) -> MultiDataSeries:
+def _count_happy_paths(el: EventLog, group: list[str], observed: bool) -> pd.DataFrame:
+    """
+    Count the cases and the cases following the happy path for each group in one pass over the case table. A case
+    follows the happy path if its de jure prefix is the complete de jure variant.
+
+    Args:
+        el (EventLog): The event log.
+        group (list[str]): The columns used for grouping.
+        observed (bool): Whether only the observed combinations of categories are kept.
+
+    Returns:
+        pd.DataFrame: The number of cases (`cases`) and happy paths (`happy_paths`) for each group.
+    """
+    is_happy_path = el.cases['dejure_prefix_length'] == len(DE_JURE_VARIANT)
+
+    return is_happy_path.groupby([el.cases[column] for column in group], observed=observed) \
+        .agg(cases='size', happy_paths='sum')
+
+
+def get_bureaucratic_duration(el: EventLog, disaggregation_column: str, legend_column: str) -> MultiDataSeries:
     """
     Calculate bureaucratic duration based on specified disaggregation attributes in the event log.
 
     Args:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
         disaggregation_column (str): The column used for disaggregation.
         legend_column (str): The column used for legend.
 
@@ -101,13 +115,13 @@ def get_bureaucratic_duration(el: pd.DataFrame, disaggregation_column: str, lege
     return MultiDataSeries.from_pandas(subcase_duration, 'Bureaucratic duration')
 
 
-def get_evaluation_to_approach(el: pd.DataFrame, disaggregation_column: str, legend_column: str) -> MultiDataSeries:
+def get_evaluation_to_approach(el: EventLog, disaggregation_column: str, legend_column: str) -> MultiDataSeries:
     """
         Calculate evaluation-to-approach duration information based on specified disaggregation attributes in the
         event log.
 
         Args:
-            el (pd.DataFrame): The event log.
+            el (EventLog): The event log.
             disaggregation_column (str): The column used for disaggregation.
             legend_column (str): The column used for legend.
 
@@ -121,14 +135,14 @@ def get_evaluation_to_approach(el: pd.DataFrame, disaggregation_column: str, leg
     return MultiDataSeries.from_pandas(subcase_duration, 'Evaluation to approach')
 
 
-def get_authorization_to_procurement(el: pd.DataFrame, disaggregation_column: str,
+def get_authorization_to_procurement(el: EventLog, disaggregation_column: str,
                                      legend_column: str) -> MultiDataSeries:
     """
         Calculate authorization-to-procurement duration information based on specified disaggregation attributes in
         the event log.
 
         Args:
-            el (pd.DataFrame): The event log.
+            el (EventLog): The event log.
             disaggregation_column (str): The column used for disaggregation.
             legend_column (str): The column used for legend.
 
@@ -142,26 +156,35 @@ def get_authorization_to_procurement(el: pd.DataFrame, disaggregation_column: st
     return MultiDataSeries.from_pandas(subcase_duration, 'Authorization to procurement')
 
 
-def _get_duration_between_activities(el: pd.DataFrame, start_activity: str, end_activity: str, group: list[str]) -> \
-        pd.DataFrame:
+def _get_duration_between_activities(el: EventLog, start_activity: str, end_activity: str, group: list[str]) -> \
+        pd.Series:
     """
     Calculate the duration between two activities based on specified disaggregation attributes in the event log.
 
+    Like pm4py's `filter_between`, only cases in which the end activity follows the start activity are considered.
+    The durations are computed from the [activity matrix][backend.src.process_mining.event_log.get_activity_matrix] of
+    the case table, so any pair of activities can be used.
+
     Args:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
         start_activity (str): The start activity.
         end_activity (str): The end activity.
         group (list[str]): The columns used for grouping.
 
     Returns:
-        pd.DataFrame: The duration between two activities based on specified disaggregation attributes in the event log.
+        pd.Series: The mean duration in seconds between two activities for each group.
     """
-    # filter only the subcases between start_activity and end_activity
-    variant = filter_between(el, start_activity, end_activity)
+    cases = el.cases
+    start_position = cases.get(f'position:{start_activity}', pd.Series(-1, index=cases.index))
+    end_position = cases.get(f'position:{end_activity}', pd.Series(-1, index=cases.index))
+
+    # select the cases with both activities, where the end activity follows the start activity
+    between = ((start_position >= 0) & (end_position > start_position)).to_numpy()
+    subcases = cases[between]
+
     # calculate the duration of each subcase
-    subcase_duration = variant.groupby(group) \
-        .apply(lambda x: get_all_case_durations(x)) \
-        .explode() \
-        .groupby(group) \
-        .mean()
-    return subcase_duration
+    duration = (subcases[f'time:{end_activity}'] - subcases[f'time:{start_activity}']).dt.total_seconds() \
+        if between.any() else pd.Series(dtype=np.float64)
+
+    # all combinations of categories are kept, groups without subcases have no duration
+    return duration.groupby([subcases[column] for column in group], observed=False).mean()
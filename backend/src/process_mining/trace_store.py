@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class TraceStore:
+    """
+    The traces of an event log as integer arrays in compressed sparse row layout: the events of all cases are stored
+    one after another in the order of the case table, and the events of the case at position `i` are the slice
+    `case_offsets[i]:case_offsets[i + 1]`. Algorithms that only need the activities and timestamps of the traces, like
+    the discovery of directly-follows relations, can work on these arrays without any pandas overhead.
+
+    Attributes:
+        activities (pd.Index): The activity names, the activity codes are positions in this index.
+        activity_codes (np.ndarray): The code of the activity of every event (uint8).
+        timestamps (np.ndarray): The timestamp of every event in nanoseconds since the epoch (int64).
+        case_offsets (np.ndarray): The position of the first event of every case and the number of events as last
+            entry (int64).
+    """
+    activities: pd.Index
+    activity_codes: np.ndarray
+    timestamps: np.ndarray
+    case_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        """
+        Returns the number of cases.
+
+        Returns:
+            (int): The number of cases.
+        """
+        return len(self.case_offsets) - 1
+
+    @property
+    def case_lengths(self) -> np.ndarray:
+        """
+        Returns the number of events of every case.
+
+        Returns:
+            (np.ndarray): The number of events with one entry per case.
+        """
+        return np.diff(self.case_offsets)
+
+    @cached_property
+    def case_index(self) -> np.ndarray:
+        """
+        Returns the position of the case of every event, which is computed on first access.
+
+        Returns:
+            (np.ndarray): The position of the case in the case table with one entry per event.
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int32), self.case_lengths)
+
+    def get_directly_follows(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns all pairs of directly following events of the same case. Like in pm4py, the events of a case are
+        ordered by their timestamps, events with the same timestamp keep their order and events without timestamp are
+        ordered last.
+
+        Returns:
+            (np.ndarray): The position of the first event of every pair.
+            (np.ndarray): The position of the following event of every pair.
+        """
+        case_index = self.case_index
+        same_case = case_index[1:] == case_index[:-1]
+        order = np.arange(len(self.activity_codes))
+
+        # the events are usually ordered by their timestamps already, so they are only sorted if they are not
+        timestamps = np.where(self.timestamps == np.iinfo(np.int64).min, np.iinfo(np.int64).max, self.timestamps)
+        if (timestamps[1:] < timestamps[:-1])[same_case].any():
+            # the cases stay in place, so the pairs of events of the same case do not change
+            order = np.lexsort((timestamps, case_index))
+
+        return order[:-1][same_case], order[1:][same_case]
+
+    def get_trace(self, case: int) -> list[str]:
+        """
+        Returns the activities of the case at the given position.
+
+        Args:
+            case (int): The position of the case in the case table.
+
+        Returns:
+            (list[str]): The activities of the case in the order of their events.
+        """
+        codes = self.activity_codes[self.case_offsets[case]:self.case_offsets[case + 1]]
+        return list(self.activities[codes])
+
+    def to_events(self) -> pd.DataFrame:
+        """
+        Convert the trace store to the event table of an event log.
+
+        Returns:
+            (pd.DataFrame): The event table with the position of the case, the activity and the timestamp of every
+                event.
+        """
+        return pd.DataFrame({
+            'case:index': self.case_index,
+            'concept:name': pd.Categorical.from_codes(self.activity_codes.astype(np.int16), categories=self.activities),
+            'time:timestamp': self.timestamps.view('datetime64[ns]'),
+        })
+
+
+def create_trace_store(events: pd.DataFrame, case_count: int) -> TraceStore:
+    """
+    Create the trace store from the event table of an event log.
+
+    Args:
+        events (pd.DataFrame): The event table, which is ordered by case, see
+            [EventLog][backend.src.process_mining.event_log.EventLog].
+        case_count (int): The number of cases of the event log.
+
+    Returns:
+        (TraceStore): The trace store.
+    """
+    activities = events['concept:name'].cat.categories
+    if len(activities) > np.iinfo(np.uint8).max:
+        raise ValueError(f'The trace store supports at most {np.iinfo(np.uint8).max} activities.')
+
+    codes = events['concept:name'].cat.codes.to_numpy()
+    if (codes < 0).any():
+        raise ValueError('The activity of every event must be known.')
+
+    case_offsets = np.zeros(case_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(events['case:index'].to_numpy(), minlength=case_count), out=case_offsets[1:])
+
+    return TraceStore(
+        activities=activities,
+        activity_codes=codes.astype(np.uint8),
+        timestamps=events['time:timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+        case_offsets=case_offsets,
+    )
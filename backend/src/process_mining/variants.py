@@ -1,63 +1,77 @@
 from typing import Collection
 
+import numpy as np
 import pandas as pd
-from pm4py.objects.log.util import pandas_numpy_variants
 
 from backend.src.dataclasses.charts import Variant, DataSeries
+from backend.src.process_mining.event_log import EventLog
 
 
-def get_variants_with_case_ids(el: pd.DataFrame) -> dict[Collection[str], list[str]]:
+def get_variants_with_case_ids(el: EventLog) -> dict[Collection[str], list[str]]:
     """
     Returns a dictionary of variants (tuples of activity names) and the case ids that belong to them.
 
     Attributes:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
 
     Returns:
         A dictionary of variants and the case ids that belong to them.
     """
-    # apply the pm4py function to get the variant per case
-    _, cases = pandas_numpy_variants.apply(el, parameters={})
+    # group the case ids by the variant of the case
+    cases = el.cases.groupby('variant', observed=True, sort=False)['case:concept:name']
 
-    # switch keys and values in the dictionary to get the list of cases per variant
-    variants = {}
-    for case_id, variant in cases.items():
-        if variant not in variants:
-            variants[variant] = []
-        variants[variant].append(case_id)
+    return {tuple(variant.split(' ')): case_ids.tolist() for variant, case_ids in cases}
 
-    return variants
 
-
-def get_variants_with_frequencies(el: pd.DataFrame, disaggregation_column: str) -> list[Variant]:
+def get_variants_with_frequencies(el: EventLog, disaggregation_column: str) -> list[Variant]:
     """
     Returns a list of variants with their frequencies and distributions of the given disaggregation attribute.
     The variants are sorted by their frequency in descending order.
 
+    The cases are counted for all combinations of variant and disaggregation value at once, such that no data frame is
+    created per variant.
+
     Attributes:
-        el (pd.DataFrame): The event log.
+        el (EventLog): The event log.
         disaggregation_column (str): The name of the column to disaggregate the variants.
 
     Returns:
         A list of variants with their frequencies and distributions of the given disaggregation attribute.
     """
-    variants = get_variants_with_case_ids(el)
-    total_case_count = el['case:concept:name'].nunique()
+    total_case_count = len(el.cases)
+    variants = el.cases['variant'].cat
+    column = el.cases[disaggregation_column]
+
+    # like value_counts, all categories of a categorical column are counted, even if no case has them
+    is_categorical = isinstance(column.dtype, pd.CategoricalDtype)
+    values, keys = (column.cat.codes.to_numpy(), column.cat.categories) if is_categorical \
+        else pd.factorize(column, use_na_sentinel=True)
+
+    # count the cases per variant (rows) and value (columns), missing values are counted in the last column
+    variant_codes = variants.codes.to_numpy().astype(np.int64)
+    values = np.where(values < 0, len(keys), values).astype(np.int64)
+    shape = (len(variants.categories), len(keys) + 1)
+    counts = np.bincount(variant_codes * shape[1] + values, minlength=shape[0] * shape[1]).reshape(shape)
+
+    # the variants are ordered by their first case, like the groups of a groupby without sorting
+    observed, first_case = np.unique(variant_codes, return_index=True)
+    keys = keys.tolist()
 
     result: list[Variant] = []
-    for variant, case_ids in variants.items():
-        distribution = el.loc[el['case:concept:name'].isin(case_ids)] \
-            .groupby('case:concept:name') \
-            .first()[disaggregation_column] \
-            .value_counts(dropna=False)
-        distribution.index = distribution.index.fillna('None')
+    for code in observed[np.argsort(first_case)]:
+        row = counts[code]
+        count = int(row.sum())
+
+        distribution = {key: int(n) for key, n in zip(keys, row[:-1]) if is_categorical or n > 0}
+        if row[-1] > 0:
+            distribution['None'] = int(row[-1])
 
         result.append(Variant(
-            activities=list(variant),
-            count=len(case_ids),
-            frequency=len(case_ids) / total_case_count,
+            activities=variants.categories[code].split(' '),
+            count=count,
+            frequency=count / total_case_count,
             distribution=DataSeries.from_dict(
-                data=distribution.to_dict(),
+                data=distribution,
                 name=disaggregation_column,
                 sort_by=disaggregation_column
             )
@@ -4,6 +4,8 @@ from backend.src.dataclasses.attributes import AttributeType
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 CLEAN_EVENT_LOG_PATH = f'{ROOT_DIR}/backend/data/processed/orchid_event_log.csv'
+COLUMNAR_EVENT_LOG_PATH = f'{ROOT_DIR}/backend/data/processed/orchid_event_log'
+RESULT_CACHE_PATH = f'{ROOT_DIR}/backend/data/cache/results.sqlite'
 
 PATIENT_ATTRIBUTES = {
     'opo_id': AttributeType.CATEGORICAL,
@@ -35,6 +37,8 @@ FILTER_ATTRIBUTES = {
     'case_duration': AttributeType.NUMERICAL,
 }
 
+DE_JURE_VARIANT = ('Referral', 'Evaluation', 'Approach', 'Authorization', 'Procurement', 'Transplant')
+
 SORT_ORDERS = {
     'referral_day_of_week': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
 }
\ No newline at end of file
@@ -0,0 +1,52 @@
+import pytest
+
+import app as orca
+from backend.src.flask.warmup import WarmUp
+
+
+class TestReferralsEndpoint:
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(orca, 'REFERRALS_TOKEN', 'secret')
+        monkeypatch.setattr(orca, 'REFERRALS_MAX_BYTES', 100)
+        # the event log of the application must not be changed by the tests
+        monkeypatch.setattr(orca.PROCESS_MINING_SERVICE, 'append_referrals', lambda raw: len(raw))
+        return orca.app.test_client()
+
+    def test_disabled_without_token(self, client, monkeypatch):
+        monkeypatch.setattr(orca, 'REFERRALS_TOKEN', None)
+
+        response = client.post('/referrals', data='PatientID\n1\n', headers={'Authorization': 'Bearer '})
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'secret'}])
+    def test_token_is_required(self, client, headers):
+        assert client.post('/referrals', data='PatientID\n1\n', headers=headers).status_code == 401
+
+    def test_size_is_limited(self, client):
+        response = client.post('/referrals', data='PatientID\n' + '1\n' * 100,
+                               headers={'Authorization': 'Bearer secret'})
+
+        assert response.status_code == 413
+
+    def test_append(self, client):
+        response = client.post('/referrals', data='PatientID\n1\n2\n', headers={'Authorization': 'Bearer secret'})
+
+        assert response.status_code == 200
+        assert response.json == {'cases': 2}
+
+
+class TestWarmUpEndpoint:
+    def test_not_ready_during_warmup(self, monkeypatch):
+        monkeypatch.setattr(orca, 'WARMUP', WarmUp(orca.app, [('/dfg', {})]))
+
+        response = orca.app.test_client().get('/warmup')
+
+        assert response.status_code == 503
+        assert not response.json['finished']
+
+    def test_ready_without_warmup(self, monkeypatch):
+        monkeypatch.setattr(orca, 'WARMUP', WarmUp(orca.app, []))
+
+        assert orca.app.test_client().get('/warmup').status_code == 200
@@ -0,0 +1,121 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.data.benchmark import generate_raw
+from backend.src.data.extract import extract
+from backend.src.dataclasses.filters import CategoricalFilter, FilterOperator
+from backend.src.flask.services.process_mining_service import ProcessMiningService
+from backend.src.process_mining.event_log import append_event_log, create_event_log, load_event_log
+
+
+@pytest.fixture(scope='module')
+def event_log_frame():
+    # the events are parsed from their csv representation, like the events of the event log file
+    text = extract(generate_raw(1000, seed=1)).to_csv(index=False)
+    return pd.read_csv(io.StringIO(text))
+
+
+class TestAppendEventLog:
+    @pytest.mark.parametrize('fraction', [0.5, 0.01])
+    def test_identical_to_full_load(self, event_log_frame, fraction):
+        case_ids = event_log_frame['case:concept:name'].unique()
+        new_case_ids = np.random.default_rng(0).choice(case_ids, int(len(case_ids) * fraction), replace=False)
+        new_events = event_log_frame['case:concept:name'].isin(new_case_ids)
+
+        el = create_event_log(event_log_frame[~new_events].reset_index(drop=True))
+        delta = create_event_log(event_log_frame[new_events].reset_index(drop=True))
+
+        result = append_event_log(el, delta)
+        expected = create_event_log(event_log_frame.copy())
+
+        pd.testing.assert_frame_equal(result.cases, expected.cases)
+        pd.testing.assert_frame_equal(result.events, expected.events)
+
+    def test_new_activities(self, event_log_frame):
+        # the delta only contains the referral, so the activity matrix of its case lacks all other activities
+        new_events = event_log_frame['case:concept:name'] == event_log_frame.loc[0, 'case:concept:name']
+        el = create_event_log(event_log_frame[new_events].head(1).reset_index(drop=True))
+        delta = create_event_log(event_log_frame[~new_events].reset_index(drop=True))
+
+        result = append_event_log(el, delta)
+        expected = create_event_log(pd.concat([event_log_frame[new_events].head(1), event_log_frame[~new_events]]))
+
+        pd.testing.assert_frame_equal(result.cases, expected.cases)
+        pd.testing.assert_frame_equal(result.events, expected.events)
+
+    def test_duplicated_cases(self, event_log_frame):
+        el = create_event_log(event_log_frame.copy())
+
+        with pytest.raises(ValueError):
+            append_event_log(el, el)
+
+
+class TestAppendReferrals:
+    @pytest.fixture
+    def service(self, tmp_path, event_log_frame):
+        path = os.path.join(tmp_path, 'event_log.csv')
+        event_log_frame.to_csv(path, index=False)
+        return ProcessMiningService(path, os.path.join(tmp_path, 'event_log'))
+
+    @pytest.fixture
+    def referrals(self, service):
+        # the new referrals only contain known values, so only the cases of OPO1 are affected
+        raw = generate_raw(20, seed=2)
+        raw['PatientID'] = 'NEW_' + raw['PatientID']
+        raw['OPO'] = 'OPO1'
+        raw['HospitalID'] = service.event_log.cases.loc[service.event_log.cases['opo_id'] == 'OPO1',
+                                                        'hospital_id'].iloc[0]
+        return raw
+
+    def test_identical_to_full_load(self, service, referrals):
+        case_count = len(service.event_log.cases)
+
+        cases = service.append_referrals(referrals)
+
+        assert cases > 0
+        assert len(service.event_log.cases) == case_count + cases
+        for el in [load_event_log(service.path), load_event_log(service.path, service.columnar_path)]:
+            pd.testing.assert_frame_equal(service.event_log.cases, el.cases)
+            pd.testing.assert_frame_equal(service.event_log.events, el.events)
+
+    def test_missing_columns(self, service, referrals):
+        with pytest.raises(ValueError):
+            service.append_referrals(referrals.drop(columns=['time_referred']))
+
+        assert service.generation == 0
+
+    def test_only_affected_filters_are_invalidated(self, service, referrals):
+        affected = [CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.EQUALS, values=['OPO1'])]
+        unaffected = [CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.EQUALS, values=['OPO2'])]
+        cached = service.filter_cache.get(service.event_log, unaffected)
+        service.filter_cache.get(service.event_log, affected)
+
+        service.append_referrals(referrals)
+
+        assert service.category_generation == 0
+        assert service.get_generation(affected) == 1
+        assert service.get_generation(unaffected) == 0
+        assert service.get_generation([]) == 1
+
+        assert service.filter_cache.get(service.event_log, unaffected) is cached
+        assert service.filter_cache.stats()['entries'] == 1
+
+    def test_version_is_durable(self, service, referrals):
+        affected = [CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.EQUALS, values=['OPO1'])]
+        unaffected = [CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.EQUALS, values=['OPO2'])]
+        version = service.get_version()
+
+        service.append_referrals(referrals)
+
+        assert service.get_version(unaffected) == version
+        assert service.get_version(affected) == service.get_version() != version
+
+        # after a restart, the generations start again, but the results from before the append are not used
+        restarted = ProcessMiningService(service.path, service.columnar_path)
+        assert restarted.generation == 0
+        assert restarted.get_version(unaffected) == restarted.get_version(affected) == service.get_version()
+
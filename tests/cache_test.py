@@ -0,0 +1,152 @@
+import os
+import pickle
+import sqlite3
+import subprocess
+import sys
+import time
+import zlib
+from contextlib import closing
+
+import pytest
+from flask import Flask
+from flask_caching import Cache
+
+from backend.src.dataclasses.attributes import AttributeType, DisaggregationAttribute
+from backend.src.dataclasses.filters import CategoricalFilter, FilterOperator, NumericalFilter
+from backend.src.dataclasses.requests import DistributionRequest, KpiRequest, KpiType, VariantListRequest
+from backend.src.flask.cache import SQLiteCache, get_request_digest
+from definitions import ROOT_DIR
+
+
+class TestRequestDigest:
+    def kpi_request(self, filters, kpi=KpiType.DROP_OUT):
+        return KpiRequest(filters=filters, kpi=kpi,
+                          disaggregation_attribute=DisaggregationAttribute('age', AttributeType.NUMERICAL, [0, 30]))
+
+    def test_filter_order_does_not_matter(self):
+        gender = CategoricalFilter(attribute_name='gender', operator=FilterOperator.CONTAINS, values=['M', 'F'])
+        age = NumericalFilter(attribute_name='age', operator=FilterOperator.GREATER_THAN, value=40.0)
+        reordered = CategoricalFilter(attribute_name='gender', operator=FilterOperator.CONTAINS, values=['F', 'M'])
+
+        assert get_request_digest(self.kpi_request([gender, age])) == get_request_digest(
+            self.kpi_request([age, reordered]))
+
+    def test_different_requests(self):
+        age = NumericalFilter(attribute_name='age', operator=FilterOperator.GREATER_THAN, value=40.0)
+        attribute = DisaggregationAttribute('gender', AttributeType.CATEGORICAL)
+
+        assert get_request_digest(self.kpi_request([age])) != get_request_digest(self.kpi_request([]))
+        assert get_request_digest(self.kpi_request([age])) != get_request_digest(
+            self.kpi_request([age], KpiType.HAPPY_PATH_ADHERENCE))
+        assert get_request_digest(VariantListRequest(filters=[], disaggregation_attribute=attribute)) != \
+            get_request_digest(DistributionRequest(filters=[], disaggregation_attribute=attribute))
+
+    def test_digest_is_stable_across_processes(self):
+        code = ('from backend.src.dataclasses.attributes import AttributeType, DisaggregationAttribute;'
+                'from backend.src.dataclasses.requests import VariantListRequest;'
+                'from backend.src.flask.cache import SQLiteCache, get_request_digest;'
+                'print(get_request_digest(VariantListRequest(filters=None, '
+                'disaggregation_attribute=DisaggregationAttribute("gender", AttributeType.CATEGORICAL))))')
+
+        digests = {subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True,
+                                  env={'PYTHONHASHSEED': seed, 'PYTHONPATH': ROOT_DIR}).stdout
+                   for seed in ['1', '2']}
+
+        assert len(digests) == 1
+        assert digests.pop().strip() == get_request_digest(VariantListRequest(
+            filters=None, disaggregation_attribute=DisaggregationAttribute('gender', AttributeType.CATEGORICAL)))
+
+
+class TestSQLiteCache:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return os.path.join(tmp_path, 'cache', 'results.sqlite')
+
+    def test_set_and_get(self, path):
+        cache = SQLiteCache(path)
+        value = {'data': [{'x': 'F', 'y': 842}] * 1000}
+
+        assert cache.get('key') is None
+        assert cache.set('key', value)
+        assert cache.get('key') == value
+        assert cache.has('key')
+        assert not cache.add('key', None)
+
+        assert cache.delete('key')
+        assert not cache.has('key')
+
+    def test_values_are_compressed(self, path):
+        cache = SQLiteCache(path)
+        value = 'a' * 100_000
+
+        cache.set('key', value)
+
+        with closing(sqlite3.connect(path)) as conn:
+            size, = conn.execute('SELECT size FROM cache').fetchone()
+        assert size < len(value) / 10
+
+    def test_shared_between_instances(self, path):
+        SQLiteCache(path).set('key', [1, 2, 3])
+
+        assert SQLiteCache(path).get('key') == [1, 2, 3]
+
+    def test_least_recently_used_are_evicted(self, path):
+        cache = SQLiteCache(path, threshold=2)
+
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+    def test_access_of_other_instance_is_recent(self, path):
+        cache = SQLiteCache(path, threshold=2)
+
+        cache.set('a', 1)
+        cache.set('b', 2)
+        SQLiteCache(path, threshold=2).get('a')
+        cache.set('c', 3)
+
+        assert cache.has('a')
+        assert not cache.has('b')
+
+        # the least recently used entries are found with the index
+        with closing(sqlite3.connect(path)) as conn:
+            plan = conn.execute('EXPLAIN QUERY PLAN SELECT key, size FROM cache ORDER BY accessed').fetchall()
+        assert 'cache_accessed' in str(plan)
+
+    def test_size_bound(self, path):
+        cache = SQLiteCache(path, max_bytes=len(zlib.compress(pickle.dumps(os.urandom(1000), 5))) + 100)
+
+        cache.set('a', os.urandom(1000))
+        cache.set('b', os.urandom(1000))
+
+        assert not cache.has('a')
+        assert cache.has('b')
+        assert not cache.set('c', os.urandom(10_000))
+
+    def test_timeout(self, path):
+        cache = SQLiteCache(path)
+
+        cache.set('expired', 1, timeout=-1)
+        cache.set('forever', 2, timeout=0)
+
+        assert cache.get('expired') is None
+        assert cache.get('forever') == 2
+
+    def test_flask_configuration(self, path):
+        app = Flask(__name__)
+        cache = Cache(app, config={'CACHE_TYPE': 'backend.src.flask.cache.SQLiteCache', 'CACHE_SQLITE_PATH': path,
+                                   'CACHE_THRESHOLD': 10})
+
+        @app.route('/value')
+        @cache.cached(timeout=60)
+        def value():
+            return str(time.time_ns())
+
+        client = app.test_client()
+        assert client.get('/value').data == client.get('/value').data
+        assert cache.cache.threshold == 10
@@ -0,0 +1,76 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.data.columnar import is_columnar_fresh, read_columnar, write_columnar
+from backend.src.process_mining.event_log import load_event_log
+from definitions import ROOT_DIR
+
+
+class TestColumnarStore:
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        path = os.path.join(tmp_path, 'event_log.csv')
+        shutil.copy(os.path.join(ROOT_DIR, 'tests', 'test_sample.csv'), path)
+        return path
+
+    @pytest.fixture
+    def columnar_path(self, tmp_path):
+        return os.path.join(tmp_path, 'event_log')
+
+    def test_round_trip(self, test_log, columnar_path):
+        write_columnar(test_log.cases, columnar_path)
+
+        pd.testing.assert_frame_equal(read_columnar(columnar_path), test_log.cases)
+
+    def test_columns_are_memory_mapped(self, test_log, columnar_path):
+        write_columnar(test_log.cases, columnar_path)
+        cases = read_columnar(columnar_path)
+
+        # the columns are not copied into a consolidated block, so they stay backed by the column files
+        assert isinstance(cases['age'].to_numpy().base, np.memmap)
+        assert isinstance(cases['time:Referral'].to_numpy().base, np.memmap)
+        assert not isinstance(read_columnar(columnar_path, mmap=False)['age'].to_numpy().base, np.memmap)
+
+        # the mapping is copy-on-write, so modifying a column does not change the store
+        cases['age'].to_numpy()[:] = -1
+        pd.testing.assert_frame_equal(read_columnar(columnar_path), test_log.cases)
+
+    def test_rewrite_keeps_read_store(self, test_log, columnar_path):
+        write_columnar(test_log.cases, columnar_path)
+        cases = read_columnar(columnar_path)
+
+        appended = pd.concat([test_log.cases, test_log.cases], ignore_index=True)
+        write_columnar(appended, columnar_path)
+
+        # the data frame that was read before still maps the columns of the previous store
+        pd.testing.assert_frame_equal(cases, test_log.cases)
+        pd.testing.assert_frame_equal(read_columnar(columnar_path), appended)
+        assert len([file for file in os.listdir(columnar_path) if file.endswith('.npy')]) == len(appended.columns)
+
+    def test_store_is_written_on_first_load(self, csv_path, columnar_path):
+        assert not is_columnar_fresh(os.path.join(columnar_path, 'cases'), csv_path)
+
+        el = load_event_log(csv_path, columnar_path)
+
+        assert is_columnar_fresh(os.path.join(columnar_path, 'cases'), csv_path)
+        assert is_columnar_fresh(os.path.join(columnar_path, 'events'), csv_path)
+
+        loaded = load_event_log(csv_path, columnar_path)
+        pd.testing.assert_frame_equal(loaded.cases, el.cases)
+        pd.testing.assert_frame_equal(loaded.events, el.events)
+
+    def test_store_is_stale_after_source_changes(self, csv_path, columnar_path):
+        load_event_log(csv_path, columnar_path)
+
+        # drop the last event of the log
+        with open(csv_path) as f:
+            lines = f.readlines()
+        with open(csv_path, 'w') as f:
+            f.writelines(lines[:-1])
+
+        assert not is_columnar_fresh(os.path.join(columnar_path, 'cases'), csv_path)
+        assert len(load_event_log(csv_path, columnar_path)) == len(lines) - 2
@@ -1,10 +1,15 @@
+import io
 import os
 
+import numpy as np
+import pandas as pd
 import pytest
 
+from backend.src.data.benchmark import generate_raw
+from backend.src.data.extract import extract
 from backend.src.dataclasses.attributes import DisaggregationAttribute, AttributeType
 from backend.src.flask.services.process_mining_service import ProcessMiningService
-from backend.src.process_mining.event_log import load_event_log, load_patient_attributes
+from backend.src.process_mining.event_log import create_event_log, load_event_log, load_patient_attributes
 from definitions import ROOT_DIR
 
 
@@ -36,6 +41,23 @@ def event_log(process_mining_service):
     return process_mining_service.event_log
 
 
+@pytest.fixture(scope='session')
+def synthetic_event_log():
+    # the events are parsed from their csv representation, like the events of the event log file
+    df = pd.read_csv(io.StringIO(extract(generate_raw(2000, seed=3)).to_csv(index=False)))
+
+    # some events are out of order or have the same timestamp as the previous event of the log
+    rng = np.random.default_rng(3)
+    timestamps = pd.to_datetime(df['time:timestamp'])
+    shifted = rng.random(len(df)) < 0.05
+    timestamps[shifted] -= pd.to_timedelta(rng.integers(-3, 3, shifted.sum()), unit='D')
+    tied = np.flatnonzero(rng.random(len(df)) < 0.05)
+    timestamps.iloc[tied[tied > 0]] = timestamps.iloc[tied[tied > 0] - 1].to_numpy()
+    df['time:timestamp'] = timestamps.dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    return create_event_log(df)
+
+
 @pytest.fixture
 def categorical_disaggregation_attribute():
     return DisaggregationAttribute(
@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 from backend.src.dataclasses.attributes import DisaggregationAttribute, AttributeType
@@ -38,26 +40,50 @@ class TestPatientAttributes:
 
     def test_binning_without_disaggregation_attribute(self, event_log):
         el, _ = create_bins(event_log)
-        assert event_log.equals(el)
+        assert event_log.cases.equals(el.cases)
 
     def test_binning_for_categorical_attribute(self, event_log, categorical_disaggregation_attribute):
-        original_event_log = event_log.copy()
+        original_cases = event_log.cases.copy()
 
         el, column = create_bins(event_log, categorical_disaggregation_attribute)
 
         # original event log should not be modified
-        assert event_log.equals(original_event_log)
+        assert event_log.cases.equals(original_cases)
 
         # as the disaggregation attribute is categorical, the event log should not be modified at all
-        assert event_log.equals(el)
+        assert event_log.cases.equals(el.cases)
 
     def test_binning_for_numerical_attribute(self, event_log, numerical_disaggregation_attribute):
-        original_event_log = event_log.copy()
+        original_cases = event_log.cases.copy()
 
         el, column = create_bins(event_log, numerical_disaggregation_attribute)
 
         # original event log should not be modified
-        assert event_log.equals(original_event_log)
+        assert event_log.cases.equals(original_cases)
 
         # new column should only contain the bin labels or NaN (if the value does not fit into any bin)
-        assert el[column].isin(numerical_disaggregation_attribute.get_bin_labels() + [None]).all()
+        assert el.cases[column].isin(numerical_disaggregation_attribute.get_bin_labels() + [None]).all()
+
+    @pytest.mark.parametrize('bins', [[0, 30, 60, 90], [-10, 0.5, 18, 45, 200], [40, 50]])
+    def test_binning_equals_cut(self, event_log, bins):
+        attribute = DisaggregationAttribute('age', AttributeType.NUMERICAL, bins=bins)
+        # values on the edges, outside of the bins and missing values
+        cases = event_log.cases.head(len(bins) * 2 + 2).copy()
+        cases['age'] = bins + [bins[0] - 1, bins[-1] + 1, float('nan')] + [b + 0.5 for b in bins[:-1]]
+        el = event_log.with_cases(pd.concat([cases, event_log.cases]))
+
+        binned, column = create_bins(el, attribute)
+
+        expected = pd.cut(el.cases['age'], bins=attribute.get_bins(), labels=attribute.get_bin_labels())
+        pd.testing.assert_series_equal(binned.cases[column], expected)
+        pd.testing.assert_frame_equal(binned.cases.drop(columns=column), el.cases.drop(columns=column))
+
+    def test_bin_codes_are_cached(self, event_log, numerical_disaggregation_attribute):
+        el, column = create_bins(event_log, numerical_disaggregation_attribute)
+        other, _ = create_bins(event_log, numerical_disaggregation_attribute)
+
+        codes = event_log.get_bin_codes(column, numerical_disaggregation_attribute.get_bins())
+        assert codes is event_log.get_bin_codes(column, list(numerical_disaggregation_attribute.get_bins()))
+        assert np.shares_memory(el.cases[column].cat.codes.to_numpy(), other.cases[column].cat.codes.to_numpy())
+        # the other columns are shared with the original event log
+        assert np.shares_memory(el.cases['gender'].cat.codes.to_numpy(), event_log.cases['gender'].cat.codes.to_numpy())
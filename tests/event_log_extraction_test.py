@@ -1,11 +1,20 @@
+import io
+import os
+
 import pandas as pd
 import pytest
 
 from definitions import ROOT_DIR
-from backend.src.data.extract import PATIENT_DATA_MAPPING, RAW_DATASET
+from backend.src.data.benchmark import generate_raw
+from backend.src.data.extract import PATIENT_DATA_MAPPING, RAW_DATASET, extract, extract_chunked, extract_iterative
 
 
 class TestEventLogExtraction:
+    @pytest.fixture(scope='class')
+    def event_log(self, event_log):
+        # the extraction is checked on the event-level data frame
+        return event_log.to_frame()
+
     @pytest.fixture(scope='class')
     def raw_data(self):
         path = f'{ROOT_DIR}/backend/data/raw/{RAW_DATASET}'
@@ -43,3 +52,71 @@ class TestEventLogExtraction:
 
         for col in outcome_columns:
             assert event_log[col].dropna().isin(allowed_outcomes).all()
+
+
+class TestVectorizedExtraction:
+    @pytest.fixture(scope='class')
+    def synthetic_raw_data(self):
+        return generate_raw(1000, seed=42)
+
+    def test_identical_to_iterative_extraction(self, synthetic_raw_data):
+        expected = extract_iterative(synthetic_raw_data.copy())
+        result = extract(synthetic_raw_data.copy())
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_identical_with_missing_flags_and_outcomes(self, synthetic_raw_data):
+        raw = synthetic_raw_data.head(100).copy()
+        raw['approached'] = raw['approached'].astype(object)
+        raw.loc[0, 'approached'] = None
+        raw['outcome_heart'] = None
+
+        expected = extract_iterative(raw.copy())
+        result = extract(raw.copy())
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+class TestChunkedExtraction:
+    @pytest.fixture
+    def raw_path(self, tmp_path):
+        raw = generate_raw(1000, seed=42)
+        # cases that span multiple chunks, one of them with a missing timestamp
+        raw.loc[900, 'PatientID'] = raw.loc[10, 'PatientID']
+        raw.loc[901, 'PatientID'] = raw.loc[raw['approached'] & raw['time_approached'].isna(), 'PatientID'].iloc[0]
+
+        path = os.path.join(tmp_path, 'raw.csv')
+        raw.to_csv(path, index=False)
+        return path
+
+    @pytest.mark.parametrize('chunk_size', [97, 1000, 5000])
+    def test_identical_to_extraction(self, raw_path, tmp_path, chunk_size):
+        output_path = os.path.join(tmp_path, 'event_log.csv')
+
+        count = extract_chunked(raw_path, output_path, chunk_size=chunk_size)
+
+        # the events are compared after parsing, as the timestamps of each block are formatted independently
+        result = pd.read_csv(output_path)
+        expected = pd.read_csv(io.StringIO(extract(pd.read_csv(raw_path)).to_csv(index=False)))
+        for df in (result, expected):
+            df['time:timestamp'] = pd.to_datetime(df['time:timestamp'], format='ISO8601')
+
+        assert count == len(expected)
+        pd.testing.assert_frame_equal(result, expected)
+        # the temporary runs are removed
+        assert set(os.listdir(tmp_path)) == {'raw.csv', 'event_log.csv'}
+
+    @pytest.mark.parametrize('workers, partitions', [(2, None), (3, 5)])
+    def test_parallel_identical_to_extraction(self, raw_path, tmp_path, workers, partitions):
+        serial_path, parallel_path = os.path.join(tmp_path, 'serial.csv'), os.path.join(tmp_path, 'parallel.csv')
+
+        extract_chunked(raw_path, serial_path, chunk_size=97)
+        count = extract_chunked(raw_path, parallel_path, chunk_size=97, workers=workers, partitions=partitions)
+
+        result, expected = pd.read_csv(parallel_path), pd.read_csv(serial_path)
+        for df in (result, expected):
+            df['time:timestamp'] = pd.to_datetime(df['time:timestamp'], format='ISO8601')
+
+        assert count == len(expected)
+        pd.testing.assert_frame_equal(result, expected)
+        assert set(os.listdir(tmp_path)) == {'raw.csv', 'serial.csv', 'parallel.csv'}
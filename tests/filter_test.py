@@ -1,5 +1,11 @@
+import numpy as np
+import pandas as pd
+import pytest
+
 from backend.src.dataclasses.filters import CategoricalFilter, FilterOperator, NumericalFilter
 from backend.src.process_mining.event_log import filter_log
+from backend.src.process_mining.filter_cache import FilterCache, get_filter_key
+from backend.src.process_mining.filter_index import FilterIndex, get_filter_mask
 
 
 class TestEventLogFiltering:
@@ -110,3 +116,132 @@ class TestEventLogFiltering:
         el = filter_log(test_log, filters)
 
         assert len(el) == 6
+
+
+class TestFilterIndex:
+    @pytest.fixture
+    def filter_index(self, event_log):
+        return FilterIndex(event_log.cases)
+
+    @pytest.mark.parametrize('attribute_name', ['gender', 'race', 'opo_id', 'outcome_heart', 'variant'])
+    @pytest.mark.parametrize('operator', [FilterOperator.IS_EMPTY, FilterOperator.IS_NOT_EMPTY, FilterOperator.EQUALS,
+                                          FilterOperator.NOT_EQUALS, FilterOperator.CONTAINS,
+                                          FilterOperator.NOT_CONTAINS])
+    def test_categorical_filters(self, event_log, filter_index, attribute_name, operator):
+        values = event_log.cases[attribute_name].dropna().unique()[:2].tolist()
+        f = CategoricalFilter(attribute_name=attribute_name, operator=operator, values=values)
+
+        expected = get_filter_mask(event_log.cases[attribute_name], f)
+
+        np.testing.assert_array_equal(filter_index.resolve([f]), expected)
+
+    @pytest.mark.parametrize('attribute_name', ['age', 'case_size', 'case_duration'])
+    @pytest.mark.parametrize('operator', [FilterOperator.IS_EMPTY, FilterOperator.IS_NOT_EMPTY, FilterOperator.EQUALS,
+                                          FilterOperator.NOT_EQUALS, FilterOperator.LESS_THAN,
+                                          FilterOperator.LESS_THAN_OR_EQUALS, FilterOperator.GREATER_THAN,
+                                          FilterOperator.GREATER_THAN_OR_EQUALS])
+    def test_numerical_filters(self, event_log, filter_index, attribute_name, operator):
+        value = event_log.cases[attribute_name].median()
+        f = NumericalFilter(attribute_name=attribute_name, operator=operator, value=value)
+
+        expected = get_filter_mask(event_log.cases[attribute_name], f)
+
+        np.testing.assert_array_equal(filter_index.resolve([f]), expected)
+
+    def test_filters_are_combined(self, event_log, filter_index):
+        filters = [
+            CategoricalFilter(attribute_name='gender', operator=FilterOperator.EQUALS, values=['M']),
+            CategoricalFilter(attribute_name='outcome_heart', operator=FilterOperator.IS_NOT_EMPTY, values=None),
+            NumericalFilter(attribute_name='age', operator=FilterOperator.GREATER_THAN, value=40),
+        ]
+
+        expected = np.logical_and.reduce([get_filter_mask(event_log.cases[f.attribute_name], f) for f in filters])
+
+        np.testing.assert_array_equal(filter_index.resolve(filters), expected)
+        assert filter_index.resolve([]).all()
+
+    def test_unknown_value(self, event_log, filter_index):
+        equals = CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.EQUALS, values=['OPO0'])
+        not_equals = CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.NOT_EQUALS, values=['OPO0'])
+
+        assert not filter_index.resolve([equals]).any()
+        np.testing.assert_array_equal(filter_index.resolve([not_equals]), event_log.cases['opo_id'].notna().to_numpy())
+
+
+class TestFilterCache:
+    @pytest.fixture
+    def filters(self):
+        return [
+            CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.CONTAINS, values=['OPO2', 'OPO1']),
+            NumericalFilter(attribute_name='age', operator=FilterOperator.GREATER_THAN, value=20),
+        ]
+
+    def test_key_is_order_independent(self, filters):
+        reordered = [
+            filters[1],
+            CategoricalFilter(attribute_name='opo_id', operator=FilterOperator.CONTAINS, values=['OPO1', 'OPO2']),
+            filters[1],
+        ]
+
+        assert get_filter_key(filters) == get_filter_key(reordered)
+        assert get_filter_key(filters) != get_filter_key(filters[:1])
+        assert get_filter_key(
+            [CategoricalFilter(attribute_name='referral_year', operator=FilterOperator.EQUALS, values=['2018'])]
+        ) != get_filter_key(
+            [CategoricalFilter(attribute_name='referral_year', operator=FilterOperator.EQUALS, values=[2018])])
+
+    def test_hits_and_misses(self, test_log, filters):
+        cache = FilterCache()
+
+        el = cache.get(test_log, filters)
+        assert cache.get(test_log, filters[::-1]) is el
+        assert cache.stats() | {'bytes': 0} == {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': 0}
+
+        expected = filter_log(test_log, filters)
+        pd.testing.assert_frame_equal(el.cases, expected.cases)
+        pd.testing.assert_frame_equal(el.events, expected.events)
+
+    def test_eviction(self, test_log, filters):
+        cache = FilterCache(max_entries=1)
+
+        cache.get(test_log, filters)
+        cache.get(test_log, filters[:1])
+        cache.get(test_log, filters)
+
+        assert cache.stats()['misses'] == 3
+        assert cache.stats()['evictions'] == 2
+        assert cache.stats()['entries'] == 1
+
+    def test_memory_bound(self, test_log, filters):
+        cache = FilterCache(max_bytes=0)
+
+        cache.get(test_log, filters)
+
+        assert cache.stats()['entries'] == 0
+        assert cache.stats()['bytes'] == 0
+
+    def test_results_are_counted(self, test_log, filters):
+        cache = FilterCache()
+        el = cache.get(test_log, filters)
+        size = cache.stats()['bytes']
+
+        # the results that are kept with the cached event log are counted when the event log is used again
+        el.get_result(('test',), lambda: np.zeros(1000))
+        cache.get(test_log, filters)
+        assert cache.stats()['bytes'] == size + 8000
+
+        cache.max_bytes = size + 8000 - 1
+        el.get_result(('other',), lambda: np.zeros(1))
+        cache.get(test_log, filters)
+        assert cache.stats()['entries'] == 0
+        assert cache.stats()['bytes'] == 0
+
+    def test_cleared_for_other_event_log(self, test_log, event_log, filters):
+        cache = FilterCache()
+
+        cache.get(test_log, filters)
+        el = cache.get(event_log, filters)
+
+        assert cache.stats()['misses'] == 2
+        assert cache.stats()['entries'] == 1
+        assert len(el) == len(filter_log(event_log, filters))
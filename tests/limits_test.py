@@ -0,0 +1,71 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.src.flask.limits import EndpointExecutor, ExecutionTimeout, LimitExceeded
+
+
+class TestEndpointExecutor:
+    @pytest.fixture
+    def executor(self):
+        return EndpointExecutor('/test', max_workers=1, max_queue=1, timeout=5)
+
+    def test_result(self, executor):
+        assert executor.run(sum, [1, 2, 3]) == 6
+        assert executor.run(lambda x, y: x - y, 3, y=1) == 2
+        assert executor.stats() == {'running': 0, 'queued': 0, 'rejected': 0, 'timeouts': 0}
+
+    def test_exceptions_are_raised(self, executor):
+        with pytest.raises(ZeroDivisionError):
+            executor.run(lambda: 1 / 0)
+
+    def test_rejection_if_queue_is_full(self, executor):
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+            return 'done'
+
+        with ThreadPoolExecutor(2) as clients:
+            running = clients.submit(executor.run, block)
+            started.wait()
+            queued = clients.submit(executor.run, lambda: 'queued')
+            while executor.stats()['queued'] == 0:
+                time.sleep(0.01)
+
+            with pytest.raises(LimitExceeded):
+                executor.run(lambda: 'rejected')
+
+            release.set()
+            assert running.result() == 'done'
+            assert queued.result() == 'queued'
+
+        assert executor.stats()['rejected'] == 1
+        # the slots are released again
+        assert executor.run(lambda: 'again') == 'again'
+
+    def test_timeout_cancels_queued_work(self):
+        executor = EndpointExecutor('/test', max_workers=1, max_queue=1, timeout=0.1)
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def block():
+            started.set()
+            release.wait()
+
+        with ThreadPoolExecutor(1) as clients:
+            running = clients.submit(executor.run, block)
+            started.wait()
+
+            with pytest.raises(ExecutionTimeout):
+                executor.run(calls.append, 'queued')
+
+            with pytest.raises(ExecutionTimeout):
+                running.result()
+            release.set()
+
+        # the queued call was cancelled before it started
+        assert executor.run(len, calls) == 0
+        assert executor.stats()['timeouts'] == 2
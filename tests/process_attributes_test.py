@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+import pytest
+
+from backend.src.dataclasses.attributes import AttributeType
+from backend.src.process_mining.event_log import get_dejure_prefix_lengths, load_event_log
+from definitions import PATIENT_ATTRIBUTES
+
+
+class TestProcessAttributes:
+    @pytest.fixture
+    def multi_day_log(self, tmp_path):
+        path = os.path.join(tmp_path, 'event_log.csv')
+        el = pd.DataFrame([
+            {'case:concept:name': 'P1', 'concept:name': 'Referral', 'time:timestamp': '2030-01-01 10:00:00'},
+            {'case:concept:name': 'P1', 'concept:name': 'Evaluation', 'time:timestamp': '2030-01-01 10:01:00'},
+            {'case:concept:name': 'P1', 'concept:name': 'Approach', 'time:timestamp': '2030-01-02 11:00:00'},
+            {'case:concept:name': 'P2', 'concept:name': 'Referral', 'time:timestamp': '2030-01-01 10:00:00'},
+            {'case:concept:name': 'P2', 'concept:name': 'Evaluation', 'time:timestamp': '2030-01-01 10:01:00'},
+            {'case:concept:name': 'P3', 'concept:name': 'Referral', 'time:timestamp': '2030-01-01 10:00:00'},
+            {'case:concept:name': 'P3', 'concept:name': 'Evaluation', 'time:timestamp': '2030-01-01 10:01:00'},
+            {'case:concept:name': 'P3', 'concept:name': 'Approach', 'time:timestamp': '2030-01-04 10:01:30'},
+        ])
+        # all cases share the same patient attributes
+        for name, attribute_type in PATIENT_ATTRIBUTES.items():
+            el[name] = 40.0 if attribute_type == AttributeType.NUMERICAL else 'unknown'
+        el.to_csv(path, index=False)
+        return load_event_log(path).cases.set_index('case:concept:name')
+
+    def test_variants(self, test_log):
+        variants = test_log.cases.set_index('case:concept:name')['variant']
+
+        assert variants['OPO2_P1000'] == 'Referral Evaluation'
+        assert variants['OPO1_P102650'] == 'Referral Evaluation Approach Authorization Procurement Transplant'
+
+    def test_cases_share_variant(self, multi_day_log):
+        assert multi_day_log.loc['P1', 'variant'] == 'Referral Evaluation Approach'
+        assert multi_day_log.loc['P3', 'variant'] == 'Referral Evaluation Approach'
+        assert multi_day_log.loc['P2', 'variant'] == 'Referral Evaluation'
+        assert list(multi_day_log['variant'].cat.categories) == ['Referral Evaluation', 'Referral Evaluation Approach']
+
+    def test_case_duration_within_day(self, multi_day_log):
+        assert multi_day_log.loc['P2', 'case_duration'] == 60
+
+    def test_case_duration_over_multiple_days(self, multi_day_log):
+        assert multi_day_log.loc['P1', 'case_duration'] == 25 * 60 * 60
+        assert multi_day_log.loc['P3', 'case_duration'] == 3 * 24 * 60 * 60 + 90
+
+    def test_case_size_and_activities(self, multi_day_log):
+        assert multi_day_log.loc['P1', 'case_size'] == 3
+        assert multi_day_log.loc['P1', 'start_activity'] == 'Referral'
+        assert multi_day_log.loc['P1', 'end_activity'] == 'Approach'
+
+    def test_dejure_prefix_length(self, test_log):
+        cases = test_log.cases.set_index('case:concept:name')
+
+        assert cases.loc['OPO2_P1000', 'dejure_prefix_length'] == 2
+        assert cases.loc['OPO1_P102650', 'dejure_prefix_length'] == 6
+
+    def test_dejure_prefix_length_of_other_variants(self):
+        variants = pd.Series(pd.Categorical(['Referral Evaluation Approach', 'Referral Approach', None,
+                                             'Evaluation Referral', 'Referral']))
+
+        assert get_dejure_prefix_lengths(variants).tolist() == [3, 0, 0, 0, 1]
+
+    def test_activity_matrix(self, multi_day_log):
+        assert multi_day_log.loc['P1', 'time:Approach'] == pd.Timestamp('2030-01-02 11:00:00')
+        assert multi_day_log.loc['P1', 'position:Approach'] == 2
+        assert multi_day_log.loc['P1', 'position:Referral'] == 0
+
+        assert pd.isna(multi_day_log.loc['P2', 'time:Approach'])
+        assert multi_day_log.loc['P2', 'position:Approach'] == -1
@@ -1,8 +1,18 @@
+import numpy as np
+import pandas as pd
+import pm4py
 import pytest
 from backend.src.dataclasses.attributes import DisaggregationAttribute, AttributeType
 from backend.src.dataclasses.charts import DataSeries, MultiDataSeries, DataItem, Graph, Node, Edge, Variant
-from backend.src.dataclasses.requests import KpiRequest, KpiType, DistributionRequest, VariantListRequest, DfgRequest
-from backend.src.process_mining.variants import get_variants_with_case_ids
+from backend.src.dataclasses.requests import KpiBatchRequest, KpiRequest, KpiType, DistributionRequest, \
+                                            VariantListRequest, DfgRequest
+from backend.src.flask.schemas.api_endpoint_schemas import KpiBatchSchema
+from backend.src.process_mining import kpi
+from backend.src.process_mining import dejure
+from backend.src.process_mining.dejure import get_dejure_case_groups, get_dejure_variant
+from backend.src.process_mining.dfg import discover_dfg, discover_grouped_dfg, discover_grouped_performance_dfg
+from backend.src.process_mining.event_log import create_bins
+from backend.src.process_mining.variants import get_variants_with_case_ids, get_variants_with_frequencies
 
 
 class TestDistribution:
@@ -67,6 +77,21 @@ class TestVariants:
 
         assert result == expected
 
+    @pytest.mark.parametrize('attribute', ['hospital_id', 'cause_of_death', 'outcome_heart'])
+    def test_variant_distributions(self, event_log, attribute):
+        result = get_variants_with_frequencies(event_log, attribute)
+
+        for variant in result:
+            cases = event_log.cases[event_log.cases['variant'] == ' '.join(variant.activities)]
+            distribution = cases[attribute].value_counts(dropna=False)
+            distribution.index = distribution.index.fillna('None')
+
+            assert variant.count == len(cases)
+            assert variant.distribution == DataSeries.from_dict(data=distribution.to_dict(), name=attribute)
+
+        assert sum(variant.count for variant in result) == len(event_log.cases)
+        assert [variant.count for variant in result] == sorted([variant.count for variant in result], reverse=True)
+
 
 class TestKPI:
     @pytest.fixture
@@ -151,6 +176,30 @@ class TestKPI:
 
         assert result == expected
 
+    def test_adherence_without_legend(self, event_log):
+        cases = event_log.cases
+        is_happy_path = cases['variant'] == 'Referral Evaluation Approach Authorization Procurement Transplant'
+
+        happy = kpi.get_happy_path_adherence(event_log, 'opo_id', None).series[0]
+        permuted = kpi.get_permuted_path(event_log, 'opo_id', None).series[0]
+
+        for happy_item, permuted_item in zip(happy.data, permuted.data):
+            group = cases['opo_id'] == happy_item.x
+            assert happy_item.y == pytest.approx(is_happy_path[group].mean())
+            assert permuted_item.y == (~is_happy_path[group]).sum()
+
+    def test_duration_between_activities(self, test_log):
+        durations = kpi._get_duration_between_activities(test_log, 'Referral', 'Approach', ['gender'])
+
+        assert durations['F'] == 120.0
+        assert pd.isna(durations['M'])
+
+    def test_duration_requires_order(self, test_log):
+        durations = kpi._get_duration_between_activities(test_log, 'Approach', 'Referral', ['gender'])
+
+        assert durations.isna().all()
+        assert list(durations.index) == ['F', 'M']
+
     def test_bureaucratic(self, test_process_mining_service, bureaucratic_request):
         expected = MultiDataSeries(name='Bureaucratic duration', series=[
             DataSeries(name='Head Trauma', data=[
@@ -194,6 +243,30 @@ class TestKPI:
 
         assert result == expected
 
+    def test_kpi_batch(self, test_process_mining_service):
+        attributes = [DisaggregationAttribute('gender', AttributeType.CATEGORICAL),
+                      DisaggregationAttribute('age', AttributeType.NUMERICAL, bins=[0, 30, 60, 90])]
+        legend_attribute = DisaggregationAttribute('opo_id', AttributeType.CATEGORICAL)
+        request = KpiBatchRequest(filters=[], kpis=list(KpiType), disaggregation_attributes=attributes,
+                                  legend_attribute=legend_attribute)
+
+        result = test_process_mining_service.get_kpi_batch(request)
+
+        assert list(result.keys()) == ['gender', 'age']
+        for attribute in attributes:
+            for kpi_type in KpiType:
+                expected = test_process_mining_service.get_kpi_data(KpiRequest(
+                    filters=[], kpi=kpi_type, disaggregation_attribute=attribute, legend_attribute=legend_attribute))
+
+                assert result[attribute.name][kpi_type.name] == expected
+
+    def test_kpi_batch_duplicated_attributes(self):
+        attribute = {'name': 'age', 'bins': [0, 30]}
+        data = {'kpis': ['DROP_OUT'], 'disaggregation_attributes': [attribute, {**attribute, 'bins': [0, 60]}]}
+
+        assert KpiBatchSchema().validate(data)
+        assert not KpiBatchSchema().validate({**data, 'disaggregation_attributes': [attribute]})
+
 
 class TestDFG:
     @pytest.fixture
@@ -230,3 +303,84 @@ class TestDFG:
 
         # compare the edges without order
         assert sorted(result.edges, key=lambda edge: (edge.source, edge.target)) == sorted(expected.edges, key=lambda edge: (edge.source, edge.target))
+
+    @pytest.mark.parametrize('step', [1, 3])
+    def test_dfg_equals_pm4py(self, synthetic_event_log, step):
+        mask = np.zeros(len(synthetic_event_log.cases), dtype=bool)
+        mask[::step] = True
+        el = synthetic_event_log.select(mask)
+
+        dfg, start_activities, end_activities = discover_dfg(el.traces)
+
+        expected_dfg, expected_start_activities, expected_end_activities = pm4py.discover_dfg(el.to_frame(columns=[]))
+        assert dfg == expected_dfg
+        assert start_activities == expected_start_activities
+        assert end_activities == expected_end_activities
+
+
+ATTRIBUTES = [
+    DisaggregationAttribute('gender', AttributeType.CATEGORICAL),
+    DisaggregationAttribute('referral_year', AttributeType.CATEGORICAL),
+    DisaggregationAttribute('age', AttributeType.NUMERICAL, bins=[0, 30, 60, 90]),
+]
+
+
+class TestDejure:
+    @pytest.mark.parametrize('attribute', ATTRIBUTES)
+    def test_grouped_dfg_equals_pm4py(self, synthetic_event_log, attribute):
+        el, column = create_bins(synthetic_event_log, attribute)
+        case_groups, groups = get_dejure_case_groups(el, column)
+
+        grouped_dfg = discover_grouped_dfg(el.traces, case_groups, len(groups))
+
+        activities = el.traces.activities
+        result = {(groups[group], activities[source], activities[target]): grouped_dfg[group, source, target]
+                  for group, source, target in zip(*np.nonzero(grouped_dfg))}
+        expected = {(group, source, target): frequency
+                    for group, df in get_dejure_variant(el).to_frame(columns=[column]).groupby(column, observed=True)
+                    for (source, target), frequency in pm4py.discover_dfg(df)[0].items()}
+        assert result == expected
+
+    @pytest.mark.parametrize('attribute', ATTRIBUTES)
+    def test_grouped_performance_dfg_equals_pm4py(self, synthetic_event_log, attribute):
+        el, column = create_bins(synthetic_event_log, attribute)
+        case_groups, groups = get_dejure_case_groups(el, column)
+
+        performance = discover_grouped_performance_dfg(el.traces, case_groups, len(groups))
+
+        activities = el.traces.activities
+        result = {(groups[row.group], activities[row.source], activities[row.target]):
+                  {'min': row.min, 'max': row.max, 'mean': row.mean, 'median': row.median}
+                  for row in performance.itertuples()}
+        expected = {(group, source, target): {statistic: statistics[statistic]
+                                              for statistic in ['min', 'max', 'mean', 'median']}
+                    for group, df in get_dejure_variant(el).to_frame(columns=[column]).groupby(column, observed=True)
+                    for (source, target), statistics in pm4py.discover_performance_dfg(df)[0].items()}
+        assert result.keys() == expected.keys()
+        for key, statistics in expected.items():
+            assert result[key] == pytest.approx(statistics, rel=1e-12)
+
+    def test_statistics_are_reused(self, synthetic_event_log, numerical_disaggregation_attribute, monkeypatch):
+        calls = []
+
+        def discover(*args):
+            calls.append(args)
+            return discover_grouped_performance_dfg(*args)
+
+        monkeypatch.setattr(dejure, 'discover_grouped_performance_dfg', discover)
+        el = synthetic_event_log.select(np.ones(len(synthetic_event_log.cases), dtype=bool))
+
+        graphs = [dejure.get_dejure_time_graph(*create_bins(el, numerical_disaggregation_attribute), statistic)
+                  for statistic in ['min', 'max']]
+
+        assert len(calls) == 1
+        assert all(edge.value <= other.value for edge, other in zip(graphs[0].edges, graphs[1].edges))
+
+    def test_missing_result_is_reused(self, test_log):
+        el = test_log.select(np.ones(len(test_log.cases), dtype=bool))
+        calls = []
+
+        for _ in range(2):
+            el.with_cases(el.cases).get_result(('missing',), lambda: calls.append(1))
+
+        assert len(calls) == 1
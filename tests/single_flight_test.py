@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.src.flask.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_computation(self):
+        single_flight = SingleFlight()
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def compute(value):
+            calls.append(value)
+            started.set()
+            release.wait()
+            return [value]
+
+        with ThreadPoolExecutor(4) as clients:
+            leader = clients.submit(single_flight.do, 'key', compute, 1)
+            started.wait()
+            followers = [clients.submit(single_flight.do, 'key', compute, 2) for _ in range(3)]
+            while single_flight.shared < 3:
+                release.wait(0.01)
+            # calls with other keys run their own computation
+            other = clients.submit(single_flight.do, 'other', compute, 3)
+            release.set()
+
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert sorted(calls) == [1, 3]
+        assert other.result() == [3]
+        assert all(result is results[0] for result in results)
+        assert single_flight.calls == 2 and single_flight.shared == 3
+
+    def test_exceptions_are_shared(self):
+        single_flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def fail():
+            started.set()
+            release.wait()
+            raise ValueError('failed')
+
+        with ThreadPoolExecutor(2) as clients:
+            leader = clients.submit(single_flight.do, 'key', fail)
+            started.wait()
+            follower = clients.submit(single_flight.do, 'key', fail)
+            while single_flight.shared < 1:
+                release.wait(0.01)
+            release.set()
+
+            for future in (leader, follower):
+                with pytest.raises(ValueError):
+                    future.result()
+
+    def test_finished_computations_are_not_cached(self):
+        single_flight = SingleFlight()
+
+        assert single_flight.do('key', list, 'a') == ['a']
+        assert single_flight.do('key', list, 'b') == ['b']
+        assert single_flight.calls == 2
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.process_mining.trace_store import create_trace_store
+
+
+class TestTraceStore:
+    def test_layout(self, event_log):
+        traces = event_log.traces
+
+        assert len(traces) == len(event_log.cases)
+        assert traces.activity_codes.dtype == np.uint8
+        assert traces.timestamps.dtype == np.int64
+        assert traces.case_offsets[0] == 0 and traces.case_offsets[-1] == len(event_log.events)
+        np.testing.assert_array_equal(traces.case_lengths, event_log.cases['case_size'].to_numpy())
+
+    def test_traces_are_variants(self, event_log):
+        traces = event_log.traces
+
+        for case in [0, 1, len(traces) // 2, len(traces) - 1]:
+            assert ' '.join(traces.get_trace(case)) == event_log.cases['variant'].iloc[case]
+
+    def test_conversion_to_events(self, event_log):
+        pd.testing.assert_frame_equal(event_log.traces.to_events(), event_log.events)
+
+    def test_selected_cases(self, event_log):
+        mask = np.zeros(len(event_log.cases), dtype=bool)
+        mask[::3] = True
+
+        el = event_log.select(mask)
+
+        pd.testing.assert_frame_equal(el.traces.to_events(), el.events)
+        assert el.traces.get_trace(1) == event_log.traces.get_trace(3)
+        # the binned event logs share the trace store
+        assert el.with_cases(el.cases).traces is el.traces
+
+    def test_unknown_activities(self, event_log):
+        events = event_log.events.copy()
+        events.loc[0, 'concept:name'] = None
+
+        with pytest.raises(ValueError):
+            create_trace_store(events, len(event_log.cases))
@@ -0,0 +1,80 @@
+import copy
+import json
+import os
+
+from flask import Flask, jsonify, request
+from flask_caching import Cache
+
+from backend.src.flask.schemas.api_endpoint_schemas import (DejureGraphSchema, DfgSchema, DistributionSchema,
+                                                            GetVariantListSchema, KpiSchema)
+from backend.src.flask.warmup import WarmUp, get_default_warmup_requests, load_warmup_requests
+
+
+class TestWarmUp:
+    def test_default_requests_are_valid(self):
+        schemas = {'/variants': GetVariantListSchema, '/kpi': KpiSchema, '/distributions': DistributionSchema,
+                   '/dfg': DfgSchema, '/dejure': DejureGraphSchema}
+
+        requests = get_default_warmup_requests()
+
+        assert {path for path, _ in requests} == set(schemas.keys())
+        for path, body in requests:
+            assert not schemas[path]().validate(body)
+
+    def test_load_requests(self, tmp_path):
+        path = os.path.join(tmp_path, 'warmup.json')
+        with open(path, 'w') as f:
+            json.dump([{'path': '/dfg', 'body': {'disaggregation_attribute': {'name': 'gender'}}}], f)
+
+        assert load_warmup_requests(path) == [('/dfg', {'disaggregation_attribute': {'name': 'gender'}})]
+
+    def test_results_are_cached(self):
+        app = Flask(__name__)
+        cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
+        calls = []
+
+        @app.route('/square', methods=['POST'])
+        @cache.cached(timeout=60, make_cache_key=lambda: str(request.get_json()['x']))
+        def square():
+            x = request.get_json()['x']
+            if x < 0:
+                return jsonify({'message': 'negative'}), 422
+            calls.append(x)
+            return jsonify(x * x)
+
+        warmup = WarmUp(app, [('/square', {'x': 2}), ('/square', {'x': 3}), ('/square', {'x': -1})])
+        assert warmup.stats()['done'] == 0
+        assert not warmup.ready
+
+        warmup.start()
+        warmup.join(10)
+
+        stats = warmup.stats()
+        assert stats['finished']
+        assert warmup.ready
+        assert (stats['total'], stats['done'], stats['failed']) == (3, 3, 1)
+        # the requests of the users are answered from the cache
+        assert app.test_client().post('/square', json={'x': 3}).json == 9
+        assert calls == [2, 3]
+
+    def test_ready_without_requests(self):
+        assert WarmUp(Flask(__name__), []).ready
+
+    def test_progress_is_shared(self):
+        app = Flask(__name__)
+        cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
+
+        @app.route('/square', methods=['POST'])
+        def square():
+            return jsonify(request.get_json()['x'] ** 2)
+
+        warmup = WarmUp(app, [('/square', {'x': 2}), ('/square', {'x': 3})], cache)
+        # a forked worker that does not run the warm-up itself
+        worker = copy.copy(warmup)
+        assert not worker.ready
+
+        warmup.start()
+        warmup.join(10)
+
+        assert worker.ready
+        assert (worker.stats()['done'], worker.stats()['failed']) == (2, 0)